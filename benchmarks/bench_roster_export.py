@@ -0,0 +1,76 @@
+"""Benchmark: streaming all-records PDF export time and peak memory
+
+Usage: python benchmarks/bench_roster_export.py [rows ...]   (default: 1000 10000 100000)
+
+Each size runs in a fresh process against a synthetic database so the peak
+RSS reported is that export's own high-water mark.
+"""
+import os
+import resource
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from main import stream_roster_pdf
+from repository import migrate_database
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process in MB (ru_maxrss is KB on Linux, bytes on macOS)"""
+    # Linux keeps ru_maxrss across exec, so a child would report its parent's peak; VmHWM starts fresh
+    if os.path.exists('/proc/self/status'):
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) / 1024
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def build_database(path, rows):
+    """Create a database with `rows` synthetic students owned by the admin account"""
+    conn = sqlite3.connect(path)
+    migrate_database(conn)
+    owner_id = conn.execute("SELECT id FROM users WHERE username = 'admin'").fetchone()[0]
+    conn.executemany(
+        "INSERT INTO credentials (title, username, password, category, first_name, middle_name, last_name, owner_id) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+        ((f"Student {i}", f"24-{i:06d}", f"First{i % 997}", ('Active', 'Graduate', 'Inactive')[i % 3],
+          f"First{i % 997}", "M", f"Last{i % 1499}", owner_id) for i in range(rows))
+    )
+    conn.commit()
+    return conn, owner_id
+
+
+def run_one(rows):
+    """Export `rows` records and print one result line"""
+    with tempfile.TemporaryDirectory() as tmp:
+        conn, owner_id = build_database(os.path.join(tmp, "bench.db"), rows)
+        baseline = peak_rss_mb()
+        pdf_path = os.path.join(tmp, "roster.pdf")
+        
+        start = time.perf_counter()
+        written = stream_roster_pdf(conn, owner_id, pdf_path)
+        elapsed = time.perf_counter() - start
+        
+        print(f"{written:>8,} rows  {elapsed:7.2f}s  {written / elapsed:9,.0f} rows/s  "
+              f"peak RSS {peak_rss_mb():6.1f} MB (before export {baseline:.1f} MB)  "
+              f"PDF {os.path.getsize(pdf_path) / (1024 * 1024):.1f} MB")
+
+
+def main():
+    if len(sys.argv) == 3 and sys.argv[1] == '--one':
+        run_one(int(sys.argv[2]))
+        return
+    
+    sizes = [int(arg) for arg in sys.argv[1:]] or [1000, 10000, 100000]
+    for rows in sizes:
+        subprocess.run([sys.executable, os.path.abspath(__file__), '--one', str(rows)], check=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,294 @@
+"""Benchmark suite: search, list, stats, view, exports and backup at scale
+
+Usage: python benchmarks/bench_suite.py [SIZE ...] [--data-dir DIR] [--scenarios NAME ...]
+                                        [--repeat N] [--save-baseline] [--check] [--tolerance 0.25]
+
+SIZE is a number of students (default: 10000 100000; 1000000 works too but
+takes a while to generate). Datasets come from generate_dataset.py and are
+kept in --data-dir between runs (default: a temporary folder). Each
+scenario runs in a fresh process against its dataset, so the peak RSS
+reported is that scenario's own high-water mark. The results show p50 and
+p95 latency per iteration. They are compared with benchmarks/baselines.json
+when it has an entry for the same size and scenario. --save-baseline
+records the current run there instead. --check exits with status 1 when a
+p95 is more than --tolerance (and over a millisecond) worse than its
+baseline, or when the ranked search is not driven by the full-text index
+(checked with and without the dataset's planner statistics).
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_roster_export import peak_rss_mb
+from generate_dataset import FIRST_NAMES, LAST_NAMES, generate
+
+BASELINES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines.json")
+DEFAULT_SIZES = (10000, 100000)
+# Slowdowns smaller than this are timer noise, whatever the percentage
+NOISE_FLOOR_MS = 1.0
+
+# Iterations per scenario; whole-database jobs are timed fewer times
+SCENARIO_REPEATS = {
+    'search': 50,
+    'list_load': 50,
+    'list_scroll': 20,
+    'stats': 50,
+    'view': 20,
+    'export_single': 20,
+    'export_bulk': 3,
+    'backup': 3,
+}
+
+
+def percentile(samples, fraction):
+    """Nearest-rank percentile of a list of numbers"""
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, max(0, round(fraction * len(ordered) + 0.5) - 1))]
+
+
+class Scenario:
+    """Per-process state for one scenario: the dataset connection and a scratch folder"""
+
+    def __init__(self, db_path, scratch_dir):
+        from repository import AttachmentStore, StudentRepository
+        
+        self.db_path = db_path
+        self.scratch_dir = scratch_dir
+        self.conn = sqlite3.connect(db_path)
+        self.owner_id = self.conn.execute("SELECT id FROM users WHERE username = 'admin'").fetchone()[0]
+        attachments_dir = os.path.join(os.path.dirname(os.path.abspath(db_path)), 'student_attachments')
+        self.students = StudentRepository(self.conn, AttachmentStore(attachments_dir))
+        self.rng = random.Random(7)
+        self.first_id, self.last_id = self.conn.execute("SELECT MIN(id), MAX(id) FROM credentials").fetchone()
+        self.with_attachments = [row[0] for row in self.conn.execute(
+            "SELECT DISTINCT credential_id FROM attachments ORDER BY credential_id")]
+
+    def random_id(self):
+        return self.rng.randint(self.first_id, self.last_id)
+
+    def search(self):
+        """Type-ahead search: ranked FTS page plus its match count"""
+        term = self.rng.choice(FIRST_NAMES + LAST_NAMES)[:self.rng.randint(3, 5)]
+        list_filter = self.students.build_filter(self.owner_id, term)
+        self.students.search(list_filter)
+        self.students.count(list_filter)
+
+    def list_load(self):
+        """Opening the student list (optionally on one status): first page plus the total"""
+        status = self.rng.choice(("All", "Active", "Graduate", "Inactive"))
+        list_filter = self.students.build_filter(self.owner_id, status=status)
+        self.students.search(list_filter)
+        self.students.count(list_filter)
+
+    def list_scroll(self):
+        """Scrolling ten pages down the list by keyset"""
+        list_filter = self.students.build_filter(self.owner_id)
+        rows = self.students.search(list_filter)
+        for _ in range(10):
+            if not rows:
+                break
+            rows = self.students.search(list_filter, older_than=(rows[-1].updated_at, rows[-1].id))
+
+    def stats(self):
+        """Dashboard and statistics report queries"""
+        self.students.stats(self.owner_id)
+        self.students.recent(self.owner_id, 5)
+        self.students.monthly_stats(self.owner_id, 6)
+
+    def view(self):
+        """view_credential: the record, its attachments and cold thumbnails for each image"""
+        from main import ThumbnailCache
+        
+        cred_id = self.rng.choice(self.with_attachments) if self.with_attachments else self.random_id()
+        self.students.get_records(self.owner_id, [cred_id])
+        cache_dir = tempfile.mkdtemp(dir=self.scratch_dir)
+        cache = ThumbnailCache(cache_dir, 50 * 1024 * 1024)
+        for _, stored_path, _ in self.students.attachments(cred_id):
+            cache.get(stored_path)
+        shutil.rmtree(cache_dir)
+
+    def export_single(self):
+        """Single-student PDF"""
+        from main import render_student_pdf
+        
+        cred_id = self.random_id()
+        record = self.students.get_records(self.owner_id, [cred_id]).get(cred_id)
+        if record:
+            render_student_pdf(record, os.path.join(self.scratch_dir, "student.pdf"))
+
+    def export_bulk(self):
+        """All-records roster PDF"""
+        from main import stream_roster_pdf
+        
+        stream_roster_pdf(self.conn, self.owner_id, os.path.join(self.scratch_dir, "roster.pdf"))
+
+    def backup(self):
+        """Verified online backup"""
+        from main import backup_database_online
+        
+        backup_database_online(self.db_path, os.path.join(self.scratch_dir, "backup.db"))
+
+
+def check_search_plan(db_path):
+    """Problems with the ranked search plan, with the dataset's statistics and with none at all
+    
+    The full-text index must drive the query (its scan is the first plan
+    step); running MATCH once per owner row is what made searches take
+    minutes on databases with stale statistics.
+    """
+    from repository import StudentRepository
+    
+    problems = []
+    conn = sqlite3.connect(db_path)
+    try:
+        owner_id = conn.execute("SELECT id FROM users WHERE username = 'admin'").fetchone()[0]
+        students = StudentRepository(conn)
+        list_filter = students.build_filter(owner_id, "gar")
+        for stats in ("current statistics", "no statistics"):
+            if stats == "no statistics":
+                # Dropped for this connection only: ANALYZE sqlite_schema reloads them, ROLLBACK restores them
+                conn.execute("BEGIN")
+                conn.execute("DELETE FROM sqlite_stat1")
+                conn.execute("ANALYZE sqlite_schema")
+            plan = students.explain(list_filter)
+            if not plan or not plan[0].startswith("SCAN credentials_fts"):
+                problems.append(f"{stats}: {' / '.join(plan)}")
+        conn.rollback()
+    finally:
+        conn.close()
+    return problems
+
+
+def run_scenario(name, db_path, repeat):
+    """Time one scenario in this process and print its samples as JSON"""
+    with tempfile.TemporaryDirectory() as scratch_dir:
+        scenario = Scenario(db_path, scratch_dir)
+        step = getattr(scenario, name)
+        step()  # Warm-up: imports and the page cache are not what we measure
+        samples = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            step()
+            samples.append((time.perf_counter() - start) * 1000)
+    print(json.dumps({'scenario': name, 'samples_ms': samples, 'peak_rss_mb': round(peak_rss_mb(), 1)}))
+
+
+def ensure_dataset(data_dir, students):
+    """Path of the dataset for this size, generating it on first use"""
+    path = os.path.join(data_dir, f"students_{students}", "students.db")
+    if not os.path.exists(path):
+        print(f"Generating {students:,} students...", file=sys.stderr)
+        start = time.perf_counter()
+        conn, _, _ = generate(path, students)
+        conn.close()
+        print(f"  done in {time.perf_counter() - start:.1f}s", file=sys.stderr)
+    return path
+
+
+def load_baselines():
+    if not os.path.exists(BASELINES_PATH):
+        return {'environment': {}, 'results': {}}
+    with open(BASELINES_PATH, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def environment():
+    """What the numbers were measured on"""
+    return {
+        'python': platform.python_version(),
+        'sqlite': sqlite3.sqlite_version,
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Student records benchmark suite")
+    parser.add_argument('sizes', nargs='*', type=int, default=list(DEFAULT_SIZES))
+    parser.add_argument('--data-dir', help="keep generated datasets here between runs")
+    parser.add_argument('--scenarios', nargs='+', choices=list(SCENARIO_REPEATS), default=list(SCENARIO_REPEATS))
+    parser.add_argument('--repeat', type=int, help="iterations per scenario (default: per-scenario)")
+    parser.add_argument('--save-baseline', action='store_true', help="store this run in baselines.json")
+    parser.add_argument('--check', action='store_true',
+                        help="exit 1 on a bad search plan or a p95 regressed past the tolerance")
+    parser.add_argument('--tolerance', type=float, default=0.25, help="allowed p95 slowdown (default: 0.25 = 25%%)")
+    parser.add_argument('--one', nargs=3, metavar=('SCENARIO', 'DB', 'REPEAT'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    
+    if args.one:
+        name, db_path, repeat = args.one
+        run_scenario(name, db_path, int(repeat))
+        return 0
+    
+    data_dir = args.data_dir or tempfile.mkdtemp(prefix="srms_bench_")
+    baselines = load_baselines()
+    regressions = []
+    
+    try:
+        for students in args.sizes:
+            db_path = ensure_dataset(data_dir, students)
+            print(f"\n{students:,} students")
+            for problem in check_search_plan(db_path):
+                print(f"  search plan does not start with the FTS scan ({problem})  REGRESSION")
+                regressions.append((students, 'search plan'))
+            print(f"  {'scenario':<14} {'p50 ms':>10} {'p95 ms':>10} {'peak RSS':>10}   vs baseline p95")
+            size_baselines = baselines['results'].get(str(students), {})
+            results = {}
+            for name in args.scenarios:
+                repeat = args.repeat or SCENARIO_REPEATS[name]
+                output = subprocess.run(
+                    [sys.executable, os.path.abspath(__file__), '--one', name, db_path, str(repeat)],
+                    check=True, capture_output=True, text=True
+                ).stdout
+                measured = json.loads(output.strip().splitlines()[-1])
+                samples = measured['samples_ms']
+                result = results[name] = {
+                    'p50_ms': round(percentile(samples, 0.50), 2),
+                    'p95_ms': round(percentile(samples, 0.95), 2),
+                    'peak_rss_mb': measured['peak_rss_mb'],
+                    'runs': len(samples),
+                }
+                
+                comparison = ""
+                baseline = size_baselines.get(name)
+                if baseline:
+                    change = result['p95_ms'] / baseline['p95_ms'] - 1 if baseline['p95_ms'] else 0
+                    comparison = f"{change:+.0%}"
+                    if change > args.tolerance and result['p95_ms'] - baseline['p95_ms'] > NOISE_FLOOR_MS:
+                        comparison += "  REGRESSION"
+                        regressions.append((students, name))
+                print(f"  {name:<14} {result['p50_ms']:>10.2f} {result['p95_ms']:>10.2f} "
+                      f"{result['peak_rss_mb']:>7.1f} MB   {comparison}")
+            
+            if args.save_baseline:
+                baselines['results'].setdefault(str(students), {}).update(results)
+    finally:
+        if not args.data_dir:
+            shutil.rmtree(data_dir, ignore_errors=True)
+    
+    if args.save_baseline:
+        baselines['environment'] = environment()
+        with open(BASELINES_PATH, 'w', encoding='utf-8') as f:
+            json.dump(baselines, f, indent=2)
+            f.write("\n")
+        print(f"\nBaselines saved to {BASELINES_PATH}")
+    
+    if regressions and args.check:
+        print(f"\n{len(regressions)} regression(s): a bad search plan, or slower than baseline by more than "
+              f"{args.tolerance:.0%}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
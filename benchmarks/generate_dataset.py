@@ -0,0 +1,176 @@
+"""Synthetic student database generator for benchmarks
+
+Usage: python benchmarks/generate_dataset.py OUTPUT.db [--students N] [--seed S]
+                                             [--attachment-ratio R] [--image-pool N]
+
+Builds a database with the app's schema holding N students owned by the
+admin account: realistic names, a status mix, graduate fields (school year,
+SO number, date issued, series year, LRN) and creation dates spread over
+five years. A fraction of the students get one to three synthetic JPEG
+"scans" stored through the attachment blob store, drawn from a pool of
+distinct images (the same form is often uploaded for many students). The
+attachments go in student_attachments/ next to the database. The same seed
+always produces the same data. The database is built the way the app builds
+one (migrate, then insert) and is not analyzed afterwards, so benchmarks see
+the planner statistics a real install has.
+"""
+import argparse
+import io
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from repository import AttachmentStore, migrate_database
+
+FIRST_NAMES = (
+    "Juan", "Maria", "Jose", "Ana", "Mark", "Angel", "John", "Mary", "Christian", "Kristine", "Paolo", "Jasmine",
+    "Carlo", "Nicole", "Miguel", "Camille", "Rafael", "Patricia", "Joshua", "Andrea", "Gabriel", "Bea", "Francis",
+    "Danica", "Kenneth", "Rhea", "Vincent", "Trisha", "Jerome", "Joy", "Ramon", "Liza", "Noel", "Grace", "Ryan",
+    "Mae", "Arnel", "Cherry", "Dennis", "Shiela", "Renz", "Aira", "Jericho", "Princess", "Alvin", "Hazel",
+)
+MIDDLE_NAMES = ("", "Santos", "Reyes", "Cruz", "Bautista", "Ocampo", "Garcia", "Mendoza", "Torres", "Flores", "Ramos")
+LAST_NAMES = (
+    "Dela Cruz", "Garcia", "Reyes", "Ramos", "Mendoza", "Santos", "Flores", "Gonzales", "Bautista", "Villanueva",
+    "Fernandez", "Cruz", "De Guzman", "Lopez", "Perez", "Castillo", "Francisco", "Rivera", "Aquino", "Castro",
+    "Sanchez", "Torres", "De Leon", "Domingo", "Martinez", "Rodriguez", "Santiago", "Soriano", "Delos Santos",
+    "Diaz", "Hernandez", "Tolentino", "Valdez", "Ramirez", "Morales", "Mercado", "Tan", "Aguilar", "Navarro",
+    "Manalo", "Gomez", "Dizon", "Del Rosario", "Javier", "Corpuz", "Gutierrez", "Salvador", "Velasco", "Pascual",
+    "Macaraeg", "Lim", "Sy", "Abellana", "Pacquiao", "Cabahug", "Lumapas", "Maglinte", "Sumalinog", "Bacus",
+)
+# Status mix of a college registry: mostly active, a large graduate archive
+STATUS_WEIGHTS = (("Active", 0.45), ("Graduate", 0.40), ("Inactive", 0.15))
+DATE_SPREAD_DAYS = 5 * 365
+BATCH_SIZE = 10000
+
+INSERT_STUDENT = '''
+    INSERT INTO credentials (title, username, password, category, first_name, middle_name, last_name, owner_id,
+                             created_at, updated_at, last_school_year, contact_number, so_number, date_issued,
+                             series_year, lrn)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+'''
+
+
+def synthetic_scan(rng, index, size=(1240, 1754)):
+    """JPEG bytes of a fake scanned form: paper tint, ruled text lines and a photo box"""
+    from PIL import Image, ImageDraw
+    
+    paper = tuple(rng.randint(235, 255) for _ in range(3))
+    img = Image.new('RGB', size, paper)
+    draw = ImageDraw.Draw(img)
+    width, height = size
+    draw.rectangle((80, 80, width - 80, 220), outline=(90, 0, 0), width=4)
+    draw.text((110, 130), f"ST. PETER'S COLLEGE - DOCUMENT {index:05d}", fill=(90, 0, 0))
+    for y in range(280, height - 120, 38):
+        length = rng.randint(width // 3, width - 200)
+        shade = rng.randint(20, 90)
+        draw.line((100, y, 100 + length, y), fill=(shade, shade, shade), width=rng.randint(2, 5))
+    draw.rectangle((width - 380, 260, width - 120, 560), fill=tuple(rng.randint(60, 200) for _ in range(3)))
+    buffer = io.BytesIO()
+    img.save(buffer, 'JPEG', quality=85)
+    return buffer.getvalue()
+
+
+def student_row(rng, index, owner_id, now):
+    """One credentials row; graduates get the graduate-only fields filled in"""
+    first_name = rng.choice(FIRST_NAMES)
+    middle_name = rng.choice(MIDDLE_NAMES)
+    last_name = rng.choice(LAST_NAMES)
+    status = rng.choices([s for s, _ in STATUS_WEIGHTS], [w for _, w in STATUS_WEIGHTS])[0]
+    created = now - timedelta(days=rng.uniform(0, DATE_SPREAD_DAYS))
+    updated = min(now, created + timedelta(days=rng.expovariate(1 / 60)))
+    id_number = f"{created.year % 100:02d}-{index:07d}"
+    
+    last_school_year = contact_number = so_number = date_issued = series_year = lrn = ""
+    if status == "Graduate":
+        year = max(2000, created.year - rng.randint(0, 3))
+        last_school_year = f"{year - 1}-{year}"
+        contact_number = f"09{rng.randint(10, 99)}{rng.randint(0, 9999999):07d}"
+        series_year = str(year)
+        so_number = f"50-{rng.randint(100, 999)}-{rng.randint(1, 9)}-{rng.randint(0, 9999):04d}-{year}"
+        date_issued = (datetime(year, 4, 1) + timedelta(days=rng.randint(0, 90))).strftime('%Y-%m-%d')
+        lrn = f"{rng.randint(100000, 999999)}{rng.randint(0, 999999):06d}"
+    
+    return (f"{first_name} {last_name} ({id_number})", id_number, first_name, status, first_name, middle_name,
+            last_name, owner_id, created.strftime('%Y-%m-%d %H:%M:%S'), updated.strftime('%Y-%m-%d %H:%M:%S'),
+            last_school_year, contact_number, so_number, date_issued, series_year, lrn)
+
+
+def generate(path, students, seed=1952, attachment_ratio=0.05, image_pool=50, progress=None):
+    """Create the database at path (replacing it) and return (conn, owner_id, attachments_stored)"""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+    rng = random.Random(seed)
+    now = datetime(2026, 1, 1)
+    
+    conn = sqlite3.connect(path)
+    # Synthetic data: durability does not matter until the end
+    conn.execute("PRAGMA synchronous = OFF")
+    migrate_database(conn)
+    owner_id = conn.execute("SELECT id FROM users WHERE username = 'admin'").fetchone()[0]
+    
+    for start in range(0, students, BATCH_SIZE):
+        conn.executemany(INSERT_STUDENT, [student_row(rng, index, owner_id, now)
+                                          for index in range(start, min(start + BATCH_SIZE, students))])
+        conn.commit()
+        if progress:
+            progress(min(start + BATCH_SIZE, students), students)
+    
+    attachments_stored = 0
+    with_attachments = int(students * attachment_ratio)
+    if with_attachments and image_pool:
+        store = AttachmentStore(os.path.join(os.path.dirname(os.path.abspath(path)), 'student_attachments'))
+        pool = []
+        with tempfile.TemporaryDirectory() as scans_dir:
+            for index in range(image_pool):
+                scan_path = os.path.join(scans_dir, f"scan_{index:05d}.jpg")
+                with open(scan_path, 'wb') as f:
+                    f.write(synthetic_scan(random.Random(seed + index), index))
+                pool.append(store.put(conn.cursor(), scan_path, f"scan_{index:05d}.jpg"))
+        
+        rows = []
+        first_id, last_id = conn.execute("SELECT MIN(id), MAX(id) FROM credentials").fetchone()
+        for cred_id in rng.sample(range(first_id, last_id + 1), with_attachments):
+            for stored in rng.sample(pool, rng.randint(1, min(3, len(pool)))):
+                rows.append((cred_id, *stored))
+        conn.executemany('''
+            INSERT INTO attachments (credential_id, stored_path, original_name, mime_type, byte_size, checksum)
+            VALUES (?, ?, ?, ?, ?, ?)
+        ''', rows)
+        conn.commit()
+        attachments_stored = len(rows)
+    
+    conn.execute("PRAGMA synchronous = FULL")
+    # No ANALYZE: like a real install, the planner only has the statistics the
+    # migrations recorded while the tables were still nearly empty
+    return conn, owner_id, attachments_stored
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic student records database")
+    parser.add_argument('output')
+    parser.add_argument('--students', type=int, default=10000)
+    parser.add_argument('--seed', type=int, default=1952)
+    parser.add_argument('--attachment-ratio', type=float, default=0.05, help="share of students with attachments")
+    parser.add_argument('--image-pool', type=int, default=50, help="distinct synthetic scans to draw from")
+    args = parser.parse_args()
+    
+    start = time.perf_counter()
+    conn, _, attachments = generate(
+        args.output, args.students, args.seed, args.attachment_ratio, args.image_pool,
+        progress=lambda done, total: print(f"  {done:,} of {total:,} students", file=sys.stderr)
+    )
+    conn.close()
+    print(f"{args.students:,} students, {attachments:,} attachments -> {args.output} "
+          f"({os.path.getsize(args.output) / (1024 * 1024):.1f} MB) in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == '__main__':
+    main()
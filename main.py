@@ -1,3 +1,7 @@
+import time
+# Taken before anything else is imported so the startup report covers module imports
+STARTUP_STARTED = time.perf_counter()
+
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
 import sqlite3
@@ -5,19 +9,1523 @@ import hashlib
 import os
 import sys
 import json
+import csv
+import re
 import shutil
+import threading
+import queue
+import zipfile
+import tarfile
+import lzma
+import zlib
+import struct
+import multiprocessing
+import traceback
+import argparse
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor, wait, FIRST_COMPLETED
 from datetime import datetime
-from PIL import Image, ImageTk
-from reportlab.lib.pagesizes import letter, A4
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, Image as RLImage
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib import colors
-from reportlab.lib.units import inch
-from reportlab.pdfgen import canvas
 import tempfile
+# PIL and ReportLab are imported inside the functions that use them: most
+# sessions never export a PDF, and importing them here slowed every start.
+
+from repository import (AttachmentStore, QueryStats, Student, StudentRepository, close_database, connect,
+                        hash_file, open_database)
+
+
+# ==========================================================
+# BULK CSV IMPORT
+# ==========================================================
+# Rows per INSERT batch / transaction
+IMPORT_BATCH_SIZE = 5000
+
+IMPORT_STATUSES = ('Active', 'Graduate', 'Inactive')
+IMPORT_GRADUATE_FIELDS = ('last_school_year', 'contact_number', 'so_number', 'date_issued', 'series_year', 'lrn')
+
+# Header spellings used by registrar exports and by the add-student form
+IMPORT_COLUMN_ALIASES = {
+    'id': 'id_number', 'id_no': 'id_number', 'student_id': 'id_number', 'student_number': 'id_number',
+    'first': 'first_name', 'firstname': 'first_name', 'given_name': 'first_name',
+    'middle': 'middle_name', 'middlename': 'middle_name',
+    'last': 'last_name', 'lastname': 'last_name', 'surname': 'last_name', 'family_name': 'last_name',
+    'category': 'status',
+    'last_school_year_attended': 'last_school_year', 'school_year': 'last_school_year',
+    'contact': 'contact_number', 'contact_no': 'contact_number', 'phone': 'contact_number',
+    'so_no': 'so_number', 'series_of_year': 'series_year',
+    'lrn_learner_reference_number': 'lrn', 'learner_reference_number': 'lrn',
+}
+
+
+def normalize_import_header(name):
+    """Map a CSV header ("ID Number", "LRN (Learner Reference Number)"...) to a field name"""
+    key = re.sub(r'[^a-z0-9]+', '_', (name or '').strip().lower()).strip('_')
+    return IMPORT_COLUMN_ALIASES.get(key, key)
+
+
+def validate_import_row(row, known_ids):
+    """Check one CSV row; return (record, None) or (None, reason)"""
+    fields = {name: (value or '').strip() for name, value in row.items() if name}
+    id_number = fields.get('id_number', '')
+    first_name = fields.get('first_name', '')
+    last_name = fields.get('last_name', '')
+    status = fields.get('status', '').capitalize() or 'Active'
+    
+    if not id_number:
+        return None, "ID Number is required"
+    if not first_name:
+        return None, "First Name is required"
+    if not last_name:
+        return None, "Last Name is required"
+    if status not in IMPORT_STATUSES:
+        return None, f"Unknown status '{fields['status']}'"
+    if id_number in known_ids:
+        return None, f"Duplicate ID Number {id_number}"
+    
+    graduate = {name: fields.get(name, '') for name in IMPORT_GRADUATE_FIELDS}
+    if status == 'Graduate':
+        if graduate['lrn'] and not re.fullmatch(r'\d{12}', graduate['lrn']):
+            return None, "LRN must be 12 digits"
+        if graduate['date_issued']:
+            try:
+                datetime.strptime(graduate['date_issued'], '%Y-%m-%d')
+            except ValueError:
+                return None, "Date Issued must be YYYY-MM-DD"
+        if graduate['series_year'] and not re.fullmatch(r'\d{4}', graduate['series_year']):
+            return None, "Series of Year must be a 4-digit year"
+    elif any(graduate.values()):
+        return None, "Graduate fields are only allowed for Graduate status"
+    
+    known_ids.add(id_number)
+    return (
+        f"{first_name} {last_name} ({id_number})", id_number, first_name, status,
+        first_name, fields.get('middle_name', ''), last_name,
+        graduate['last_school_year'], graduate['contact_number'], graduate['so_number'],
+        graduate['date_issued'], graduate['series_year'], graduate['lrn']
+    ), None
+
+
+def import_students_from_csv(conn, csv_path, owner_id, reject_path=None, batch_size=IMPORT_BATCH_SIZE, progress=None):
+    """Stream a CSV of students into credentials; return (imported, rejected)
+    
+    Rows are validated one at a time and inserted in batches, one transaction
+    per batch. Each batch goes into a temp staging table with executemany and
+    then into credentials with a single INSERT ... SELECT. The full-text and
+    statistics triggers still fire once per inserted row; what saves the time
+    is that a whole batch shares one transaction, so the index and stats
+    updates are written to disk once per batch rather than once per row.
+    Rejected rows are written to reject_path (default:
+    <csv>_rejected.csv) with the line number and reason. progress, if given,
+    is called as progress(imported, rejected, fraction_of_file) after every batch.
+    """
+    if reject_path is None:
+        reject_path = os.path.splitext(csv_path)[0] + "_rejected.csv"
+    file_size = os.path.getsize(csv_path) or 1
+    
+    cursor = conn.cursor()
+    cursor.execute('SELECT username FROM credentials WHERE owner_id = ?', (owner_id,))
+    known_ids = {id_number for (id_number,) in cursor}
+    
+    imported = rejected = 0
+    consumed = 0
+    reject_file = reject_writer = None
+    batch = []
+    
+    columns = (
+        "title, username, password, category, first_name, middle_name, last_name, owner_id, "
+        "last_school_year, contact_number, so_number, date_issued, series_year, lrn"
+    )
+    cursor.execute(f"CREATE TEMP TABLE IF NOT EXISTS import_staging ({columns})")
+    cursor.execute("DELETE FROM import_staging")
+    
+    def flush():
+        cursor.executemany(
+            "INSERT INTO import_staging VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            ((*record[:7], owner_id, *record[7:]) for record in batch)
+        )
+        cursor.execute(f"INSERT INTO credentials ({columns}) SELECT {columns} FROM import_staging")
+        cursor.execute("DELETE FROM import_staging")
+        conn.commit()
+        batch.clear()
+        if progress:
+            progress(imported, rejected, min(consumed / file_size, 1.0))
+    
+    def counted(lines):
+        # Track how far into the file we are for the progress fraction
+        nonlocal consumed
+        for line in lines:
+            consumed += len(line)
+            yield line
+    
+    try:
+        with open(csv_path, newline='', encoding='utf-8-sig') as csv_file:
+            reader = csv.DictReader(counted(csv_file))
+            original_headers = reader.fieldnames or []
+            reader.fieldnames = [normalize_import_header(name) for name in original_headers]
+            
+            for row in reader:
+                record, reason = validate_import_row(row, known_ids)
+                if record:
+                    batch.append(record)
+                    imported += 1
+                    if len(batch) >= batch_size:
+                        flush()
+                    continue
+                
+                rejected += 1
+                if reject_writer is None:
+                    reject_file = open(reject_path, 'w', newline='', encoding='utf-8')
+                    reject_writer = csv.writer(reject_file)
+                    reject_writer.writerow(['line', 'error', *original_headers])
+                values = [row.get(name, '') for name in reader.fieldnames]
+                reject_writer.writerow([reader.line_num, reason, *values])
+            
+            flush()
+        # The import can multiply the table size; refresh the statistics the search plans rely on
+        cursor.execute("PRAGMA optimize")
+    except Exception:
+        if conn.in_transaction:
+            conn.rollback()
+        raise
+    finally:
+        if reject_file:
+            reject_file.close()
+        cursor.execute("DROP TABLE IF EXISTS temp.import_staging")
+    
+    return imported, rejected
+
+
+# ==========================================================
+# ONLINE BACKUP
+# ==========================================================
+# Database pages copied per backup step; other connections can read and write between steps
+BACKUP_PAGES_PER_STEP = 256
+
+# A commit from another connection restarts a stepwise backup; after this many
+# restarts the rest is copied in a single step instead
+BACKUP_MAX_RESTARTS = 3
+
+
+class BackupRestarted(Exception):
+    """Raised from the backup progress callback to abandon a stepwise copy that keeps restarting"""
+
+
+def backup_database_online(db_path, dest_path, pages=BACKUP_PAGES_PER_STEP, progress=None):
+    """Copy a live database with the SQLite backup API and verify the copy; return the page count
+    
+    The copy is a consistent snapshot even while the app keeps writing, and it
+    is written next to dest_path and renamed into place only after PRAGMA
+    quick_check passes. progress, if given, is called as progress(pages_done,
+    pages_total) after every step.
+    
+    If other connections keep committing, the stepwise copy restarts each
+    time. After BACKUP_MAX_RESTARTS restarts, the copy is redone in one step.
+    That step holds a single read transaction, which in WAL mode does not
+    block writers either.
+    """
+    temp_path = dest_path + ".partial"
+    if os.path.exists(temp_path):
+        os.remove(temp_path)
+    
+    source = sqlite3.connect(db_path)
+    target = sqlite3.connect(temp_path)
+    state = {'total': 0, 'done': 0, 'restarts': 0}
+    
+    def step(status, remaining, total):
+        done = total - remaining
+        if done < state['done']:
+            state['restarts'] += 1
+            if state['restarts'] > BACKUP_MAX_RESTARTS:
+                raise BackupRestarted()
+        state['total'], state['done'] = total, done
+        if progress:
+            progress(done, total)
+    
+    try:
+        try:
+            source.backup(target, pages=pages, progress=step)
+        except BackupRestarted:
+            source.backup(target, pages=-1, progress=step)
+        check = target.execute("PRAGMA quick_check").fetchone()[0]
+        # A standalone backup file should not depend on a -wal sidecar
+        target.execute("PRAGMA journal_mode=DELETE")
+    finally:
+        target.close()
+        source.close()
+    
+    if check != 'ok':
+        os.remove(temp_path)
+        raise sqlite3.DatabaseError(f"Backup failed integrity check: {check}")
+    os.replace(temp_path, dest_path)
+    return state['total']
+
+
+# ==========================================================
+# INCREMENTAL BACKUP CHAIN
+# ==========================================================
+# Start a new chain with a full snapshot after this many backups
+BACKUP_FULL_EVERY = 7
+# Number of chains (full snapshot + its deltas) kept by the retention policy
+BACKUP_KEEP_CHAINS = 4
+BACKUP_LZMA_PRESET = 3
+BACKUP_MANIFEST = "manifest.json"
+
+
+def load_backup_manifest(backup_dir):
+    """Read a backup chain manifest ({'backups': [entry, ...]}), empty if there is none yet"""
+    path = os.path.join(backup_dir, BACKUP_MANIFEST)
+    if not os.path.exists(path):
+        return {'backups': []}
+    with open(path, encoding='utf-8') as f:
+        manifest = json.load(f)
+    # Raise one error type (as for unreadable JSON) instead of a KeyError deep inside backup or restore
+    required = ('id', 'base', 'kind', 'created_at', 'data_file', 'pages_file', 'attachments_file', 'attachments',
+                'page_size', 'page_count', 'db_sha256')
+    backups = manifest.get('backups') if isinstance(manifest, dict) else None
+    if not isinstance(backups, list) or not all(isinstance(e, dict) and all(k in e for k in required) for e in backups):
+        raise ValueError(f"Backup manifest {path} is malformed")
+    return manifest
+
+
+def save_backup_manifest(backup_dir, manifest):
+    """Write the manifest atomically so an interrupted backup never corrupts the chain"""
+    path = os.path.join(backup_dir, BACKUP_MANIFEST)
+    with open(path + ".tmp", 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(path + ".tmp", path)
+
+
+def backup_archive_name(path, checksum):
+    """Name of an attachment inside a backup archive (stored paths are relative to the app folder)"""
+    normalized = os.path.normpath(path)
+    if os.path.isabs(normalized) or normalized.startswith('..'):
+        return f"external/{checksum or 'unknown'}_{os.path.basename(normalized)}"
+    return normalized.replace(os.sep, '/')
+
+
+def incremental_backup(db_path, backup_dir, full_every=BACKUP_FULL_EVERY, keep_chains=BACKUP_KEEP_CHAINS, progress=None):
+    """Add a backup to the chain in backup_dir and return its manifest entry
+    
+    The database is snapshotted with the online backup API and then compared
+    page by page with the previous backup. A full backup stores every page and
+    a delta only the pages whose hash changed, both lzma-compressed. Attachment
+    files not yet in the chain go into a .tar.xz next to it (a full backup
+    archives all of them, so every chain restores on its own). progress, if
+    given, is called as progress(stage, done, total).
+    """
+    if keep_chains < 1:
+        # Checked before the snapshot, so a bad setting does not leave a backup behind
+        raise ValueError(f"keep_chains must be at least 1, not {keep_chains}")
+    os.makedirs(backup_dir, exist_ok=True)
+    manifest = load_backup_manifest(backup_dir)
+    entries = manifest['backups']
+    backup_id = entries[-1]['id'] + 1 if entries else 1
+    prefix = f"{backup_id:05d}_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+    snapshot = os.path.join(backup_dir, prefix + ".snapshot.db")
+    
+    backup_database_online(db_path, snapshot, progress=progress and (lambda done, total: progress("Copying database", done, total)))
+    try:
+        with open(snapshot, 'rb') as f:
+            page_size = int.from_bytes(f.read(100)[16:18], 'big')
+        page_size = 65536 if page_size == 1 else page_size
+        page_count = os.path.getsize(snapshot) // page_size
+        
+        last = entries[-1] if entries else None
+        chain = [entry for entry in entries if last and entry['base'] == last['base']]
+        full = (last is None or len(chain) >= full_every or last['page_size'] != page_size
+                or not os.path.exists(os.path.join(backup_dir, last['pages_file'])))
+        if full:
+            previous_hashes = b''
+        else:
+            with open(os.path.join(backup_dir, last['pages_file']), 'rb') as f:
+                previous_hashes = zlib.decompress(f.read())
+        
+        # Compress the pages (all of them, or only changed ones with their page numbers)
+        data_file = prefix + (".full.xz" if full else ".delta.xz")
+        hashes = bytearray()
+        db_checksum = hashlib.sha256()
+        pages_written = 0
+        with open(snapshot, 'rb') as src, lzma.open(os.path.join(backup_dir, data_file), 'wb', preset=BACKUP_LZMA_PRESET) as out:
+            if not full:
+                out.write(struct.pack('>II', page_size, page_count))
+            for page_no in range(page_count):
+                page = src.read(page_size)
+                db_checksum.update(page)
+                digest = hashlib.blake2b(page, digest_size=16).digest()
+                hashes += digest
+                if full:
+                    out.write(page)
+                    pages_written += 1
+                elif previous_hashes[page_no * 16:(page_no + 1) * 16] != digest:
+                    out.write(struct.pack('>I', page_no))
+                    out.write(page)
+                    pages_written += 1
+                if progress and page_no % 1024 == 0:
+                    progress("Compressing pages", page_no, page_count)
+        
+        pages_file = prefix + ".pages"
+        with open(os.path.join(backup_dir, pages_file), 'wb') as f:
+            f.write(zlib.compress(bytes(hashes)))
+        
+        # Attachment files referenced by this snapshot that the chain does not hold yet
+        snapshot_conn = sqlite3.connect(snapshot)
+        try:
+            referenced = snapshot_conn.execute('SELECT DISTINCT stored_path, checksum FROM attachments').fetchall()
+        finally:
+            snapshot_conn.close()
+        known = set() if full else {(path, checksum) for entry in chain for path, checksum, _ in entry['attachments']}
+        new_attachments = [(path, checksum, backup_archive_name(path, checksum))
+                           for path, checksum in referenced if (path, checksum) not in known and os.path.exists(path)]
+        
+        attachments_file = None
+        if new_attachments:
+            attachments_file = prefix + ".attachments.tar.xz"
+            with tarfile.open(os.path.join(backup_dir, attachments_file), 'w:xz') as archive:
+                for done, (path, checksum, arcname) in enumerate(new_attachments):
+                    archive.add(path, arcname=arcname)
+                    if progress:
+                        progress("Archiving attachments", done + 1, len(new_attachments))
+        
+        entry = {
+            'id': backup_id,
+            'base': backup_id if full else last['base'],
+            'kind': 'full' if full else 'delta',
+            'created_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+            'data_file': data_file,
+            'pages_file': pages_file,
+            'attachments_file': attachments_file,
+            'attachments': new_attachments,
+            'page_size': page_size,
+            'page_count': page_count,
+            'pages_written': pages_written,
+            'db_sha256': db_checksum.hexdigest(),
+        }
+        entries.append(entry)
+        apply_backup_retention(backup_dir, manifest, keep_chains)
+        save_backup_manifest(backup_dir, manifest)
+        return entry
+    finally:
+        if os.path.exists(snapshot):
+            os.remove(snapshot)
+
+
+def apply_backup_retention(backup_dir, manifest, keep_chains=BACKUP_KEEP_CHAINS):
+    """Drop whole chains older than the newest keep_chains full backups (at least 1: the chain being added to)"""
+    if keep_chains < 1:
+        raise ValueError(f"keep_chains must be at least 1, not {keep_chains}")
+    bases = sorted({entry['base'] for entry in manifest['backups']})
+    expired = set(bases[:-keep_chains])
+    kept = []
+    for entry in manifest['backups']:
+        if entry['base'] not in expired:
+            kept.append(entry)
+            continue
+        for name in (entry['data_file'], entry['pages_file'], entry['attachments_file']):
+            if name and os.path.exists(os.path.join(backup_dir, name)):
+                os.remove(os.path.join(backup_dir, name))
+    manifest['backups'] = kept
+
+
+def release_database_file(db_path):
+    """Check nothing has db_path open and fold its WAL in, so the file can be replaced (ValueError if in use)"""
+    if not any(os.path.exists(db_path + suffix) for suffix in ('-wal', '-shm')):
+        return
+    # The last connection to close checkpoints the WAL and deletes -wal and -shm;
+    # if they are still there afterwards, another connection (maybe this app's) has it open
+    conn = sqlite3.connect(db_path, timeout=0)
+    try:
+        busy, _, _ = conn.execute("PRAGMA wal_checkpoint(TRUNCATE)").fetchone()
+    except sqlite3.OperationalError:
+        busy = 1
+    finally:
+        conn.close()
+    if busy or os.path.exists(db_path + '-wal') or os.path.exists(db_path + '-shm'):
+        raise ValueError(f"{db_path} is open in another program or in this app; close it before restoring over it")
+
+
+def restore_backup(backup_dir, dest_path, backup_id=None, attachments_root=None, progress=None):
+    """Rebuild the database as of backup_id (default: latest) at dest_path; return the manifest entry
+    
+    The chain's full snapshot is decompressed and its deltas are applied in
+    order, and the result is checked against the recorded SHA-256 before it
+    is moved into place. A database at dest_path must not be open anywhere
+    (ValueError otherwise), or SQLite could later replay its old WAL over
+    the restored pages. If attachments_root is given, the chain's attachment
+    archives are extracted there (attachment paths are relative to it).
+    """
+    # Fail before the (possibly long) rebuild, and check again right before the swap
+    release_database_file(dest_path)
+    entries = load_backup_manifest(backup_dir)['backups']
+    if not entries:
+        raise ValueError(f"No backups found in {backup_dir}")
+    target = entries[-1] if backup_id is None else next((e for e in entries if e['id'] == backup_id), None)
+    if target is None:
+        raise ValueError(f"Backup {backup_id} not found in {backup_dir}")
+    chain = [e for e in entries if e['base'] == target['base'] and e['id'] <= target['id']]
+    
+    temp_path = dest_path + ".partial"
+    with lzma.open(os.path.join(backup_dir, chain[0]['data_file']), 'rb') as src, open(temp_path, 'wb') as out:
+        shutil.copyfileobj(src, out, 1024 * 1024)
+    if progress:
+        progress("Restoring database", 1, len(chain))
+    
+    for step, delta in enumerate(chain[1:], start=2):
+        with lzma.open(os.path.join(backup_dir, delta['data_file']), 'rb') as src, open(temp_path, 'r+b') as out:
+            page_size, page_count = struct.unpack('>II', src.read(8))
+            while True:
+                header = src.read(4)
+                if not header:
+                    break
+                (page_no,) = struct.unpack('>I', header)
+                out.seek(page_no * page_size)
+                out.write(src.read(page_size))
+            out.truncate(page_count * page_size)
+        if progress:
+            progress("Restoring database", step, len(chain))
+    
+    checksum, _ = hash_file(temp_path)
+    if checksum != target['db_sha256']:
+        os.remove(temp_path)
+        raise ValueError(f"Restored database does not match backup {target['id']} (checksum mismatch)")
+    try:
+        release_database_file(dest_path)
+    except ValueError:
+        os.remove(temp_path)
+        raise
+    for suffix in ('-wal', '-shm'):
+        if os.path.exists(dest_path + suffix):
+            os.remove(dest_path + suffix)
+    os.replace(temp_path, dest_path)
+    
+    if attachments_root:
+        for entry in chain:
+            if entry['attachments_file']:
+                with tarfile.open(os.path.join(backup_dir, entry['attachments_file']), 'r:xz') as archive:
+                    if hasattr(tarfile, 'data_filter'):
+                        archive.extractall(attachments_root, filter='data')
+                    else:
+                        archive.extractall(attachments_root)
+    return target
+
+
+# ==========================================================
+# STREAMING PDF REPORTS
+# ==========================================================
+# Rows pulled from the database per fetchmany() call
+ROSTER_CHUNK_ROWS = 2000
+
+ROSTER_HEADER = ['ID', 'ID Number', 'Full Name', 'Status', 'Created', 'Updated']
+ROSTER_COL_WIDTHS = [0.5, 1, 2.5, 1, 1, 1]  # inches
+ROSTER_TABLE_STYLE = [
+    ('BACKGROUND', (0, 0), (-1, 0), '#800000'),  # Maroon
+    ('TEXTCOLOR', (0, 0), (-1, 0), 'whitesmoke'),
+    ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, 0), 12),
+    ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+    ('BACKGROUND', (0, 1), (-1, -1), 'beige'),
+    ('GRID', (0, 0), (-1, -1), 1, 'black'),
+    ('FONTSIZE', (0, 1), (-1, -1), 10),
+    ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+]
+
+
+def roster_row(student):
+    """Format one credentials row as a roster table row"""
+    cred_id, id_number, first_name, last_name, status, fname, mname, lname, created_at, updated_at = student
+    full_name = f"{first_name} {mname + ' ' if mname else ''}{last_name}".strip()
+    created_date = created_at[:10] if created_at else "N/A"
+    updated_date = updated_at[:10] if updated_at else "N/A"
+    return [str(cred_id), id_number, full_name, status, created_date, updated_date]
+
+
+def stream_roster_pdf(conn, owner_id, file_path, chunk_size=ROSTER_CHUNK_ROWS, progress=None):
+    """Write the all-records report page by page; return the number of students
+    
+    Rows are read with fetchmany() and drawn as one fixed-size table block per
+    page (with the header repeated), so only a page worth of rows is held at a
+    time and ReportLab never has to split one huge table. progress, if given,
+    is called as progress(rows_written, total_rows) after every page.
+    """
+    from reportlab.lib import colors
+    from reportlab.lib.pagesizes import A4
+    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+    from reportlab.lib.units import inch
+    from reportlab.pdfgen import canvas
+    from reportlab.platypus import Paragraph, Table, TableStyle
+    
+    pagesize = A4
+    margin = 0.5 * inch
+    width, height = pagesize
+    col_widths = [w * inch for w in ROSTER_COL_WIDTHS]
+    table_style = TableStyle(ROSTER_TABLE_STYLE)
+    styles = getSampleStyleSheet()
+    title_style = ParagraphStyle('CustomTitle', parent=styles['Heading1'], fontSize=20,
+                                 textColor=colors.HexColor('#800000'), spaceAfter=30)
+    subtitle_style = ParagraphStyle('CustomSubtitle', parent=styles['Normal'], fontSize=12,
+                                    textColor=colors.HexColor('#666666'), spaceAfter=20)
+    summary_style = ParagraphStyle('Summary', parent=styles['Normal'], fontSize=10,
+                                   textColor=colors.HexColor('#333333'), spaceAfter=10)
+    
+    def block(rows):
+        table = Table([ROSTER_HEADER] + rows, colWidths=col_widths)
+        table.setStyle(table_style)
+        return table
+    
+    # Rows never wrap, so every row is the same height: measure it once
+    sample = ['0', 'X', 'X', 'X', 'X', 'X']
+    header_plus_one = block([sample]).wrap(width, height)[1]
+    row_height = block([sample, sample]).wrap(width, height)[1] - header_plus_one
+    header_height = header_plus_one - row_height
+    
+    cursor = conn.cursor()
+    cursor.execute('SELECT COALESCE(SUM(record_count), 0) FROM owner_stats WHERE owner_id = ?', (owner_id,))
+    total = cursor.fetchone()[0]
+    cursor.execute('''
+        SELECT id, username, password, last_name, category, first_name, middle_name, last_name, created_at, updated_at 
+        FROM credentials 
+        WHERE owner_id = ?
+        ORDER BY last_name, first_name
+    ''', (owner_id,))
+    
+    pdf = canvas.Canvas(file_path, pagesize=pagesize, pageCompression=1)
+    y = height - margin
+    
+    def draw(flowable, y):
+        w, h = flowable.wrap(width - 2 * margin, y - margin)
+        flowable.drawOn(pdf, margin, y - h)
+        return y - h - flowable.getSpaceAfter()
+    
+    y = draw(Paragraph("Student Records Report", title_style), y)
+    y = draw(Paragraph(f"Generated on: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}<br/>Total Records: {total}",
+                       subtitle_style), y)
+    y -= 20
+    
+    written = 0
+    statuses = {}
+    pending = []
+    while True:
+        chunk = cursor.fetchmany(chunk_size)
+        for student in chunk:
+            pending.append(roster_row(student))
+            statuses[student[4]] = statuses.get(student[4], 0) + 1
+        
+        # Emit every full page; the last partial page waits for more rows (or the end)
+        while pending:
+            fits = max(int((y - margin - header_height) // row_height), 1)
+            if len(pending) < fits and chunk:
+                break
+            rows, pending = pending[:fits], pending[fits:]
+            y = draw(block(rows), y)
+            written += len(rows)
+            if pending or chunk:
+                pdf.showPage()
+                y = height - margin
+            if progress:
+                progress(written, total)
+        
+        if not chunk:
+            break
+    
+    # Summary by status, on a fresh page if the last one is full
+    summary_text = "Summary by Status:<br/>"
+    for status, count in statuses.items():
+        summary_text += f"• {status}: {count} student(s)<br/>"
+    summary = Paragraph(summary_text, summary_style)
+    y -= 30
+    if summary.wrap(width - 2 * margin, height)[1] > y - margin:
+        pdf.showPage()
+        y = height - margin
+    draw(summary, y)
+    
+    pdf.save()
+    return written
+
+
+def render_student_pdf(student, file_path):
+    """Write one student's record PDF (a top-level function so process pool workers can run it)"""
+    from reportlab.lib import colors
+    from reportlab.lib.pagesizes import A4
+    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+    from reportlab.lib.units import inch
+    from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
+    
+    title, id_number, first_name, attachment_count, status, fname, mname, lname, created_at, updated_at, last_school_year, contact_number, so_number, date_issued, series_year, lrn = student
+    
+    # Create PDF document
+    doc = SimpleDocTemplate(file_path, pagesize=A4)
+    elements = []
+    
+    # Get styles
+    styles = getSampleStyleSheet()
+    
+    # Title
+    title_style = ParagraphStyle(
+        'CustomTitle',
+        parent=styles['Heading1'],
+        fontSize=20,
+        textColor=colors.HexColor('#800000'),  # Maroon
+        spaceAfter=30
+    )
+    
+    pdf_title = Paragraph(f"Student Record: {title}", title_style)
+    elements.append(pdf_title)
+    
+    # Subtitle
+    subtitle_style = ParagraphStyle(
+        'CustomSubtitle',
+        parent=styles['Normal'],
+        fontSize=12,
+        textColor=colors.HexColor('#666666'),
+        spaceAfter=20
+    )
+    
+    subtitle = Paragraph(f"Generated on: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}", subtitle_style)
+    elements.append(subtitle)
+    
+    elements.append(Spacer(1, 30))
+    
+    # Student Information Table
+    info_data = [
+        ['Field', 'Value'],
+        ['ID Number', id_number],
+        ['First Name', first_name],
+        ['Middle Name', mname if mname else 'N/A'],
+        ['Last Name', lname],
+        ['Status', status],  # Changed label
+        ['Created Date', created_at[:10] if created_at else 'N/A'],
+        ['Last Updated', updated_at[:10] if updated_at else 'N/A']
+    ]
+    
+    # Add graduate-specific fields if status is Graduate
+    if status == 'Graduate':
+        info_data.extend([
+            ['Last School Year Attended', last_school_year if last_school_year else 'N/A'],
+            ['Contact Number', contact_number if contact_number else 'N/A'],
+            ['SO Number', so_number if so_number else 'N/A'],
+            ['Date Issued', date_issued if date_issued else 'N/A'],
+            ['Series of Year', series_year if series_year else 'N/A'],
+            ['LRN (Learner Reference Number)', lrn if lrn else 'N/A']  # ✅ ADDED LRN
+        ])
+    
+    info_table = Table(info_data, colWidths=[2*inch, 4*inch])
+    info_table.setStyle(TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#800000')),  # Maroon
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, 0), 12),
+        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+        ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+        ('GRID', (0, 0), (-1, -1), 1, colors.black),
+        ('FONTSIZE', (0, 1), (-1, -1), 10),
+        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+    ]))
+    
+    elements.append(info_table)
+    elements.append(Spacer(1, 30))
+    
+    # Footer
+    footer_style = ParagraphStyle(
+        'Footer',
+        parent=styles['Normal'],
+        fontSize=9,
+        textColor=colors.HexColor('#999999'),
+        alignment=1
+    )
+    
+    footer = Paragraph(f"Confidential Student Record - St. Peter's College Student Records System", footer_style)
+    elements.append(footer)
+    
+    # Build PDF
+    doc.build(elements)
+    return file_path
+
+
+def render_statistics_pdf(statistics, file_path):
+    """Write the statistics report for (status_counts, monthly_counts) as returned by the repository"""
+    from reportlab.lib import colors
+    from reportlab.lib.pagesizes import A4
+    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+    from reportlab.lib.units import inch
+    from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
+    
+    status_stats, monthly_stats = statistics
+    total_students = sum(count for status, count in status_stats)
+    
+    # Create PDF document
+    doc = SimpleDocTemplate(file_path, pagesize=A4)
+    elements = []
+    
+    # Get styles
+    styles = getSampleStyleSheet()
+    
+    # Title
+    title_style = ParagraphStyle(
+        'CustomTitle',
+        parent=styles['Heading1'],
+        fontSize=20,
+        textColor=colors.HexColor('#800000'),  # Maroon
+        spaceAfter=30
+    )
+    
+    title = Paragraph("Student Records Statistics Report", title_style)
+    elements.append(title)
+    
+    # Subtitle
+    subtitle_style = ParagraphStyle(
+        'CustomSubtitle',
+        parent=styles['Normal'],
+        fontSize=12,
+        textColor=colors.HexColor('#666666'),
+        spaceAfter=20
+    )
+    
+    subtitle = Paragraph(f"Generated on: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}", subtitle_style)
+    elements.append(subtitle)
+    
+    elements.append(Spacer(1, 30))
+    
+    # Summary Statistics
+    summary_style = ParagraphStyle(
+        'Summary',
+        parent=styles['Heading2'],
+        fontSize=16,
+        textColor=colors.HexColor('#333333'),
+        spaceAfter=15
+    )
+    
+    summary = Paragraph(f"Total Students: {total_students}", summary_style)
+    elements.append(summary)
+    elements.append(Spacer(1, 20))
+    
+    # Status Distribution Table (changed from Category)
+    if status_stats:
+        status_title_style = ParagraphStyle(
+            'StatusTitle',
+            parent=styles['Heading3'],
+            fontSize=14,
+            textColor=colors.HexColor('#555555'),
+            spaceAfter=10
+        )
+        
+        status_title = Paragraph("Distribution by Status:", status_title_style)  # Changed text
+        elements.append(status_title)
+        
+        status_data = [['Status', 'Number of Students', 'Percentage']]  # Changed column name
+        for status, count in status_stats:
+            percentage = (count / total_students * 100) if total_students > 0 else 0
+            status_data.append([status, str(count), f"{percentage:.1f}%"])
+        
+        status_table = Table(status_data, colWidths=[2*inch, 1.5*inch, 1.5*inch])
+        status_table.setStyle(TableStyle([
+            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#800000')),  # Maroon
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, 0), 12),
+            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+            ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+            ('GRID', (0, 0), (-1, -1), 1, colors.black),
+            ('FONTSIZE', (0, 1), (-1, -1), 10),
+        ]))
+        
+        elements.append(status_table)
+        elements.append(Spacer(1, 30))
+    
+    # Monthly Statistics
+    if monthly_stats:
+        month_title_style = ParagraphStyle(
+            'MonthTitle',
+            parent=styles['Heading3'],
+            fontSize=14,
+            textColor=colors.HexColor('#555555'),
+            spaceAfter=10
+        )
+        
+        month_title = Paragraph("Monthly Registration (Last 6 Months):", month_title_style)
+        elements.append(month_title)
+        
+        month_data = [['Month', 'New Registrations']]
+        for month, count in monthly_stats:
+            month_data.append([month, str(count)])
+        
+        month_table = Table(month_data, colWidths=[2*inch, 2*inch])
+        month_table.setStyle(TableStyle([
+            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#C41E3A')),  # Crimson
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, 0), 12),
+            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+            ('BACKGROUND', (0, 1), (-1, -1), colors.lavender),
+            ('GRID', (0, 0), (-1, -1), 1, colors.black),
+            ('FONTSIZE', (0, 1), (-1, -1), 10),
+        ]))
+        
+        elements.append(month_table)
+        elements.append(Spacer(1, 30))
+    
+    # Footer
+    footer_style = ParagraphStyle(
+        'Footer',
+        parent=styles['Normal'],
+        fontSize=9,
+        textColor=colors.HexColor('#999999'),
+        alignment=1
+    )
+    
+    footer = Paragraph(f"St. Peter's College - Student Records Management System", footer_style)
+    elements.append(footer)
+    
+    # Build PDF
+    doc.build(elements)
+
+
+def export_student_pdfs(students, output, workers=None, progress=None, cancel_event=None):
+    """Render one PDF per student in a process pool; return (files_written, cancelled)
+    
+    output is a directory, or a path ending in .zip to collect the PDFs in one
+    archive. progress, if given, is called as progress(done, total) as PDFs
+    finish; setting cancel_event stops the export and drops queued renders.
+    """
+    to_zip = output.lower().endswith('.zip')
+    target_dir = tempfile.mkdtemp(prefix="student_pdfs_") if to_zip else output
+    os.makedirs(target_dir, exist_ok=True)
+    archive = zipfile.ZipFile(output, 'w', zipfile.ZIP_DEFLATED) if to_zip else None
+    
+    used_names = set()
+    # Next suffix to try per base name
+    repeats = {}
+    
+    def pdf_name(student):
+        # ID numbers are not enforced unique; number any repeats (skipping names an ID like X_2 already took)
+        base = "student_" + re.sub(r'[^\w.-]+', '_', student[1] or 'unknown')
+        name = f"{base}.pdf"
+        while name in used_names:
+            repeats[base] = repeats.get(base, 1) + 1
+            name = f"{base}_{repeats[base]}.pdf"
+        used_names.add(name)
+        return name
+    
+    written = 0
+    cancelled = False
+    # spawn: never fork the Tk process (and its threads) into the render workers
+    executor = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'))
+    try:
+        # Keep a bounded number of renders queued so cancel takes effect quickly
+        max_in_flight = (workers or os.cpu_count() or 1) * 4
+        pending = set()
+        queue_iter = iter(students)
+        exhausted = False
+        
+        while pending or not exhausted:
+            while not exhausted and len(pending) < max_in_flight:
+                student = next(queue_iter, None)
+                if student is None:
+                    exhausted = True
+                    break
+                name = pdf_name(student)
+                pending.add(executor.submit(render_student_pdf, student, os.path.join(target_dir, name)))
+            
+            if cancel_event is not None and cancel_event.is_set():
+                cancelled = True
+                break
+            if not pending:
+                break
+            
+            done, pending = wait(pending, timeout=0.2, return_when=FIRST_COMPLETED)
+            for future in done:
+                path = future.result()
+                if archive:
+                    archive.write(path, os.path.basename(path))
+                    os.remove(path)
+                written += 1
+                if progress:
+                    progress(written, len(students))
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+        if archive:
+            archive.close()
+            shutil.rmtree(target_dir, ignore_errors=True)
+    
+    return written, cancelled
+
+
+# ==========================================================
+# THUMBNAIL CACHE
+# ==========================================================
+class ThumbnailCache:
+    """Disk cache of attachment thumbnails, evicting least recently used entries over a byte budget"""
+    
+    def __init__(self, cache_dir, max_bytes, size=(200, 200)):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.size = size
+        self.lock = threading.Lock()
+        self.total_bytes = None  # Measured on first write
+        os.makedirs(cache_dir, exist_ok=True)
+    
+    def cache_path(self, path):
+        """Cache file for the current version of an image (a changed file gets a new key)"""
+        stat = os.stat(path)
+        key = f"{os.path.abspath(path)}|{stat.st_mtime_ns}|{stat.st_size}|{self.size[0]}x{self.size[1]}"
+        return os.path.join(self.cache_dir, hashlib.sha256(key.encode('utf-8')).hexdigest() + ".png")
+    
+    def get(self, path):
+        """Return a loaded PIL thumbnail of path, rendering and caching it on a miss"""
+        from PIL import Image
+        
+        cached = self.cache_path(path)
+        try:
+            img = Image.open(cached)
+            img.load()
+            # Cache file mtime is the LRU clock
+            os.utime(cached)
+            return img
+        except (OSError, ValueError):
+            pass
+        
+        img = Image.open(path)
+        if img.format == 'JPEG':
+            # Let the JPEG decoder downscale by 1/2..1/8 while decoding (kept at 2x the
+            # thumbnail size so the LANCZOS pass below still has detail to work with)
+            img.draft('RGB', (self.size[0] * 2, self.size[1] * 2))
+        img.thumbnail(self.size, Image.Resampling.LANCZOS)
+        if img.mode not in ('RGB', 'RGBA', 'L', 'LA', 'P'):
+            img = img.convert('RGB')
+        
+        # Write to a private temp name and rename so readers never see a partial file
+        temp_path = f"{cached}.{threading.get_ident()}.tmp"
+        img.save(temp_path, 'PNG')
+        os.replace(temp_path, cached)
+        self.added(os.path.getsize(cached))
+        return img
+    
+    def added(self, nbytes):
+        """Account for a new cache file and evict if the budget is exceeded"""
+        with self.lock:
+            if self.total_bytes is None:
+                self.total_bytes = sum(entry.stat().st_size for entry in os.scandir(self.cache_dir) if entry.is_file())
+            else:
+                self.total_bytes += nbytes
+            if self.total_bytes > self.max_bytes:
+                self.evict()
+    
+    def evict(self):
+        """Delete least recently used thumbnails until the cache is back under 90% of its budget"""
+        entries = []
+        for entry in os.scandir(self.cache_dir):
+            if entry.is_file():
+                stat = entry.stat()
+                entries.append((stat.st_mtime_ns, stat.st_size, entry.path))
+        entries.sort()
+        
+        total = sum(size for _, size, _ in entries)
+        target = self.max_bytes * 0.9
+        for _, size, path in entries:
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                pass
+        self.total_bytes = total
+
+
+def load_logo_photo(path, size, cache_dir):
+    """Return a Tk PhotoImage of an image resized to size
+    
+    The resized copy is saved as a PNG in cache_dir, which Tk can load by
+    itself, so PIL is only imported the first time (or after the image changes).
+    cache_dir should hold nothing else: copies made from an older version of
+    the image are deleted when a new one is written.
+    """
+    stat = os.stat(path)
+    prefix = f"{os.path.splitext(os.path.basename(path))[0]}_{size[0]}x{size[1]}_"
+    cached = os.path.join(cache_dir, f"{prefix}{stat.st_mtime_ns}.png")
+    if not os.path.exists(cached):
+        from PIL import Image
+        
+        os.makedirs(cache_dir, exist_ok=True)
+        img = Image.open(path).resize(size, Image.Resampling.LANCZOS)
+        temp_path = f"{cached}.{threading.get_ident()}.tmp"
+        img.save(temp_path, 'PNG')
+        os.replace(temp_path, cached)
+        for name in os.listdir(cache_dir):
+            if name.startswith(prefix) and name.endswith(".png") and name != os.path.basename(cached):
+                try:
+                    os.remove(os.path.join(cache_dir, name))
+                except OSError:
+                    pass
+    return tk.PhotoImage(file=cached)
+
+
+# ==========================================================
+# STARTUP REPORT
+# ==========================================================
+# SRMS_STARTUP_REPORT=1 prints how long each startup stage took (in the
+# format of python -X importtime) to stderr. Any other value is taken as a
+# file path and one JSON line per start is appended to it as well, so
+# time-to-login-screen can be tracked across builds and machines.
+STARTUP_REPORT_ENV = "SRMS_STARTUP_REPORT"
+# Modules that should not be loaded before the first export or image
+STARTUP_HEAVY_MODULES = ('PIL', 'reportlab')
+startup_marks = [("interpreter", STARTUP_STARTED)]
+
+
+def mark_startup(stage):
+    """Record that a startup stage has finished"""
+    startup_marks.append((stage, time.perf_counter()))
+
+
+def write_startup_report(target=None):
+    """Print the startup stages recorded so far and return them as a dict (None if not enabled)"""
+    target = target if target is not None else os.environ.get(STARTUP_REPORT_ENV, "")
+    if not target or target == "0":
+        return None
+    
+    stages = {}
+    lines = ["startup: self [us] | cumulative | stage"]
+    for (_, previous), (stage, finished) in zip(startup_marks, startup_marks[1:]):
+        self_us = int((finished - previous) * 1e6)
+        cumulative_us = int((finished - STARTUP_STARTED) * 1e6)
+        stages[stage] = round(self_us / 1000, 1)
+        lines.append(f"startup: {self_us:>10} | {cumulative_us:>10} | {stage}")
+    heavy = sorted(name for name in STARTUP_HEAVY_MODULES if name in sys.modules)
+    lines.append(f"startup: heavy modules loaded: {', '.join(heavy) or 'none'}")
+    print("\n".join(lines), file=sys.stderr)
+    
+    report = {
+        'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        'python': sys.version.split()[0],
+        'stages_ms': stages,
+        'total_ms': round((startup_marks[-1][1] - STARTUP_STARTED) * 1000, 1),
+        'heavy_modules': heavy,
+    }
+    if target not in ("1", "true", "yes"):
+        with open(target, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(report) + "\n")
+    return report
+
+
+# ==========================================================
+# BACKGROUND DATABASE WORKER
+# ==========================================================
+class DatabaseWorker:
+    """Runs database jobs in order on a dedicated thread with its own connection"""
+    
+    def __init__(self, db_path, query_stats=None):
+        self.db_path = db_path
+        self.query_stats = query_stats
+        self.jobs = queue.Queue()
+        self.conn = None
+        self.current = None
+        self.lock = threading.Lock()
+        self.thread = threading.Thread(target=self.run, name="db-worker", daemon=True)
+        self.thread.start()
+    
+    def submit(self, func, *args):
+        """Queue func(cursor, *args) and return a Future for its result"""
+        future = Future()
+        self.jobs.put((future, func, args))
+        return future
+    
+    def cancel(self, future):
+        """Drop a queued job, or interrupt its SQL if it is already running"""
+        if future.cancel():
+            return
+        with self.lock:
+            if self.current is future:
+                # The running statement fails with "interrupted"; the connection stays usable
+                self.conn.interrupt()
+    
+    def run(self):
+        """Worker loop: execute jobs until close() is called"""
+        conn = self.conn = connect(self.db_path, self.query_stats)
+        cursor = conn.cursor()
+        while True:
+            job = self.jobs.get()
+            if job is None:
+                break
+            
+            future, func, args = job
+            if not future.set_running_or_notify_cancel():
+                continue
+            with self.lock:
+                self.current = future
+            try:
+                try:
+                    result = func(cursor, *args)
+                finally:
+                    with self.lock:
+                        self.current = None
+            except BaseException as e:
+                # Never leave a half-finished write open on the worker connection
+                if conn.in_transaction:
+                    conn.rollback()
+                future.set_exception(e)
+            else:
+                future.set_result(result)
+        cursor.close()
+        close_database(conn)
+    
+    def close(self):
+        """Stop the worker once the queued jobs have run"""
+        self.jobs.put(None)
+
+
+# ==========================================================
+# STALL WATCHDOG
+# ==========================================================
+# A heartbeat re-arms itself with root.after and a monitor thread checks how
+# late it is. Once the Tk thread has been away from the event loop for the
+# threshold, its stack (from sys._current_frames) is appended to the stall
+# log with the callback Tk was running, and sampled again each time the
+# stall doubles; a last line records how long the window was frozen.
+
+STALL_HEARTBEAT_MS = 100
+STALL_THRESHOLD_MS = 500
+
+
+def ui_action_name(frame):
+    """Name of the callback Tk was running, from the Tk thread's current frame"""
+    frames = []
+    while frame is not None:
+        frames.append(frame)
+        frame = frame.f_back
+    frames.reverse()
+    # co_qualname (Class.method) is new in Python 3.11
+    names = [getattr(f.f_code, 'co_qualname', f.f_code.co_name) for f in frames]
+    
+    tk_dir = os.path.dirname(tk.__file__)
+    in_tk = [f.f_code.co_filename.startswith(tk_dir) for f in frames]
+    # The last call out of tkinter is the callback being dispatched (dialogs run nested event loops)
+    starts = [i + 1 for i in range(len(frames) - 1) if in_tk[i] and not in_tk[i + 1]]
+    if not starts:
+        # Not inside the event loop, e.g. still in __init__
+        return names[min(1, len(names) - 1)]
+    
+    action = []
+    for name, tk_frame in zip(names[starts[-1]:], in_tk[starts[-1]:]):
+        if tk_frame:
+            break
+        action.append(name)
+        # A lambda only forwards to the method that does the work
+        if not name.endswith("<lambda>"):
+            break
+    return " → ".join(action)
+
+
+class StallWatchdog:
+    """Logs the Tk thread's stack whenever the event loop stops servicing a root.after heartbeat"""
+    
+    def __init__(self, root, log_path, threshold_ms=STALL_THRESHOLD_MS, heartbeat_ms=STALL_HEARTBEAT_MS):
+        self.root = root
+        self.log_path = log_path
+        self.threshold = threshold_ms / 1000
+        self.heartbeat_ms = heartbeat_ms
+        # Created on the Tk thread
+        self.thread_id = threading.get_ident()
+        self.last_beat = time.monotonic()
+        # {'action', 'started', 'next_sample'} while the current stall is being reported
+        self.stall = None
+        self.stalls = 0
+        self.lock = threading.Lock()
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self.monitor, name="stall-watchdog", daemon=True)
+    
+    def start(self):
+        self.beat()
+        self.thread.start()
+    
+    def stop(self):
+        self.stopped.set()
+    
+    def beat(self):
+        """Heartbeat on the Tk thread; also closes the record of a stall that just ended"""
+        if self.stopped.is_set():
+            return
+        now = time.monotonic()
+        with self.lock:
+            stall, self.stall = self.stall, None
+            self.last_beat = now
+        if stall:
+            self.write(f"--- {datetime.now().strftime('%Y-%m-%d %H:%M:%S')} stall in {stall.get('action', '?')} "
+                       f"ended after {now - stall['started']:.2f}s\n\n")
+        self.root.after(self.heartbeat_ms, self.beat)
+    
+    def monitor(self):
+        """Watch the heartbeat from a background thread and sample the Tk thread's stack when it is late"""
+        while not self.stopped.wait(self.heartbeat_ms / 1000):
+            # Only the snapshot is taken under the lock the heartbeat needs; walking and
+            # formatting the stack happens after, so it never holds up the loop it watches
+            with self.lock:
+                due = self.last_beat + self.heartbeat_ms / 1000
+                late = time.monotonic() - due
+                if late < self.threshold or (self.stall and late < self.stall['next_sample']):
+                    continue
+                frame = sys._current_frames().get(self.thread_id)
+                if frame is None:
+                    continue
+                first = self.stall is None
+                if first:
+                    self.stall = {'started': due}
+                    self.stalls += 1
+                stall = self.stall
+                stall['next_sample'] = late * 2
+            
+            action = ui_action_name(frame)
+            stack = "".join(traceback.format_stack(frame))
+            del frame
+            if first:
+                stall['action'] = action
+            marker = "===" if first else "..."
+            self.write(f"{marker} {datetime.now().strftime('%Y-%m-%d %H:%M:%S')} UI blocked for {late:.2f}s "
+                       f"in {action}\n{stack}\n")
+    
+    def write(self, text):
+        try:
+            with open(self.log_path, 'a', encoding='utf-8') as f:
+                f.write(text)
+        except OSError as e:
+            print(f"Could not write stall log: {e}")
+
+
+# ==========================================================
+# COMMAND LINE
+# ==========================================================
+# python main.py <command> ... runs one job without opening a window (for
+# scheduled tasks); with no arguments the app starts as usual. The commands
+# call the same functions as the export, import and backup dialogs.
+
+CLI_DEFAULT_DB = "modern_users.db"
+CLI_DEFAULT_USER = "admin"
+# Seconds between progress lines on stderr
+CLI_PROGRESS_INTERVAL = 1.0
+
+
+def cli_progress(label):
+    """Return a progress(done, total) callback that prints at most once per CLI_PROGRESS_INTERVAL"""
+    state = {'last': 0.0}
+    
+    def report(done, total=None):
+        now = time.perf_counter()
+        if now - state['last'] >= CLI_PROGRESS_INTERVAL or done == total:
+            state['last'] = now
+            print(f"  {label}: {done:,}" + (f" of {total:,}" if total is not None else ""), file=sys.stderr)
+    return report
+
+
+def cli_stage_progress():
+    """Return a progress(stage, done, total) callback for the multi-stage backup jobs"""
+    reporters = {}
+    return lambda stage, done, total: reporters.setdefault(stage, cli_progress(stage))(done, total)
+
+
+def cli_owner_id(conn, username):
+    """Resolve the account whose records a command works on"""
+    row = conn.execute('SELECT id FROM users WHERE username = ?', (username,)).fetchone()
+    if row is None:
+        raise ValueError(f"No such user: {username}")
+    return row[0]
+
+
+def cli_export_roster(args):
+    conn = open_database(args.db)
+    try:
+        written = stream_roster_pdf(conn, cli_owner_id(conn, args.user), args.output,
+                                    progress=cli_progress("students written"))
+    finally:
+        close_database(conn)
+    return f"{written:,} students -> {args.output}", written
+
+
+def cli_export_stats(args):
+    conn = open_database(args.db)
+    try:
+        owner_id = cli_owner_id(conn, args.user)
+        students = StudentRepository(conn)
+        statistics = students.stats(owner_id), students.monthly_stats(owner_id, 6)
+    finally:
+        close_database(conn)
+    render_statistics_pdf(statistics, args.output)
+    total = sum(count for status, count in statistics[0])
+    return f"statistics for {total:,} students -> {args.output}", 0
+
+
+def cli_export_students(args):
+    conn = open_database(args.db)
+    try:
+        students = StudentRepository(conn).find_records(cli_owner_id(conn, args.user), args.status,
+                                                        args.school_year, args.series_year)
+    finally:
+        close_database(conn)
+    written, _ = export_student_pdfs(students, args.output, workers=args.workers,
+                                     progress=cli_progress("PDFs written"))
+    return f"{written:,} student PDFs -> {args.output}", written
+
+
+def cli_import_csv(args):
+    report = cli_progress("rows read")
+    conn = open_database(args.db)
+    try:
+        imported, rejected = import_students_from_csv(
+            conn, args.csv, cli_owner_id(conn, args.user), args.rejects,
+            progress=lambda imported, rejected, fraction: report(imported + rejected)
+        )
+    finally:
+        close_database(conn)
+    summary = f"{imported:,} imported, {rejected:,} rejected"
+    if rejected and args.rejects:
+        summary += f" (see {args.rejects})"
+    return summary, imported + rejected
+
+
+def cli_backup(args):
+    if args.incremental:
+        entry = incremental_backup(args.db, args.destination, args.full_every, args.keep,
+                                   progress=cli_stage_progress())
+        return (f"{entry['kind']} backup #{entry['id']}: {entry['pages_written']:,} of {entry['page_count']:,} pages, "
+                f"{len(entry['attachments'])} new attachment(s) -> {args.destination}"), entry['pages_written']
+    pages = backup_database_online(args.db, args.destination, progress=cli_progress("pages copied"))
+    return f"{pages:,} pages, integrity check passed -> {args.destination}", pages
+
+
+def cli_restore(args):
+    entry = restore_backup(args.backup_dir, args.destination, args.id, args.attachments_root,
+                           progress=cli_stage_progress())
+    return f"backup #{entry['id']} ({entry['created_at']}) restored and verified -> {args.destination}", entry['page_count']
+
+
+def cli_vacuum(args):
+    size_before = os.path.getsize(args.db)
+    conn = open_database(args.db)
+    try:
+        removed = AttachmentStore(args.attachments).collect_garbage(conn, sweep_orphans=True)
+        conn.execute("PRAGMA optimize")
+        conn.execute("VACUUM")
+    finally:
+        conn.close()
+    size_after = os.path.getsize(args.db)
+    return (f"{size_before / 1048576:,.1f} MB -> {size_after / 1048576:,.1f} MB, "
+            f"{removed} unreferenced attachment blob(s) removed"), 0
+
+
+def positive_int(text):
+    """argparse type for counts that must be at least 1"""
+    value = int(text)
+    if value < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, not {value}")
+    return value
+
+
+def build_cli_parser():
+    """Argument parser for the headless commands"""
+    parser = argparse.ArgumentParser(
+        prog="main.py",
+        description="Student Records Management System. Run without arguments to open the app."
+    )
+    parser.add_argument('--db', default=CLI_DEFAULT_DB, help=f"database file (default: {CLI_DEFAULT_DB})")
+    parser.add_argument('--user', default=CLI_DEFAULT_USER, help=f"account whose records are used (default: {CLI_DEFAULT_USER})")
+    parser.add_argument('--workers', type=int, default=None, help="worker processes for parallel jobs (default: one per CPU)")
+    commands = parser.add_subparsers(dest='command', required=True)
+    
+    command = commands.add_parser('export-roster', help="all-records PDF report")
+    command.add_argument('output', help="PDF file to write")
+    command.set_defaults(run=cli_export_roster)
+    
+    command = commands.add_parser('export-stats', help="statistics PDF report")
+    command.add_argument('output', help="PDF file to write")
+    command.set_defaults(run=cli_export_stats)
+    
+    command = commands.add_parser('export-students', help="one PDF per student, rendered in parallel")
+    command.add_argument('output', help="folder, or a .zip file")
+    # Also accepted after the subcommand; SUPPRESS keeps a value given before it
+    command.add_argument('--workers', type=int, default=argparse.SUPPRESS, help="worker processes (default: one per CPU)")
+    command.add_argument('--status', default="", choices=("", *IMPORT_STATUSES))
+    command.add_argument('--school-year', default="", help="last school year attended")
+    command.add_argument('--series-year', default="")
+    command.set_defaults(run=cli_export_students)
+    
+    command = commands.add_parser('import-csv', help="bulk import students from a CSV file")
+    command.add_argument('csv')
+    command.add_argument('--rejects', help="CSV file to write rejected rows to")
+    command.set_defaults(run=cli_import_csv)
+    
+    command = commands.add_parser('backup', help="verified online backup of the live database")
+    command.add_argument('destination', help="backup .db file, or a folder with --incremental")
+    command.add_argument('--incremental', action='store_true', help="add a compressed full/delta backup to a backup chain")
+    command.add_argument('--full-every', type=int, default=BACKUP_FULL_EVERY)
+    command.add_argument('--keep', type=positive_int, default=BACKUP_KEEP_CHAINS, help="backup chains to keep (at least 1)")
+    command.set_defaults(run=cli_backup)
+    
+    command = commands.add_parser('restore', help="rebuild a database from a backup chain")
+    command.add_argument('backup_dir')
+    command.add_argument('destination', help="database file to write")
+    command.add_argument('--id', type=int, help="backup to restore (default: latest)")
+    command.add_argument('--attachments-root', help="folder to extract attachment files into")
+    command.set_defaults(run=cli_restore)
+    
+    command = commands.add_parser('vacuum', help="remove unreferenced attachments and compact the database")
+    command.add_argument('--attachments', default='student_attachments', help="attachments folder")
+    command.set_defaults(run=cli_vacuum)
+    return parser
+
+
+def run_cli(argv):
+    """Run one command-line job and print a timing summary; return the exit status
+    
+    Each command returns (summary, items processed); the items give the rate
+    shown after the elapsed time.
+    """
+    args = build_cli_parser().parse_args(argv)
+    started = time.perf_counter()
+    try:
+        summary, items = args.run(args)
+    except (OSError, ValueError, sqlite3.Error) as e:
+        print(f"✗ {args.command} failed: {e}", file=sys.stderr)
+        return 1
+    except KeyboardInterrupt:
+        print(f"✗ {args.command} interrupted", file=sys.stderr)
+        return 130
+    except Exception as e:
+        # ReportLab, PIL and the like raise their own types; scheduled jobs still get one line and a status
+        print(f"✗ {args.command} failed: {type(e).__name__}: {e}", file=sys.stderr)
+        return 1
+    elapsed = time.perf_counter() - started
+    rate = f", {items / elapsed:,.0f}/s" if items and elapsed > 0 else ""
+    print(f"✓ {args.command}: {summary} in {elapsed:.2f}s{rate}")
+    return 0
+
 
 class ModernLoginSystem:
+    # Student list paging: rows per keyset page, pages kept in the Treeview, ranked search cap
+    CRED_PAGE_SIZE = 100
+    CRED_WINDOW_PAGES = 3
+    CRED_SEARCH_LIMIT = 500
+    
+    # How often the Tk thread picks up results from background jobs (ms)
+    UI_POLL_MS = 25
+    
+    # Quiet time after the last keystroke before search-as-you-type queries (ms)
+    SEARCH_DEBOUNCE_MS = 250
+    
+    # Disk budget for cached attachment thumbnails, and threads decoding them
+    THUMBNAIL_CACHE_MB = 50
+    THUMBNAIL_WORKERS = 4
+    
+    # Threads hashing/copying attachment files into the blob store
+    INGEST_WORKERS = 4
+    
+    # Statements slower than this (ms) are written to the slow query log with their query plan
+    SLOW_QUERY_MS = 100
+    SLOW_QUERY_LOG = 'slow_queries.log'
+    
+    # Where the watchdog writes the Tk thread's stack when the window freezes
+    STALL_LOG = 'stall.log'
+    
     def __init__(self):
+        mark_startup("module imports")
         # Colors for modern theme - Maroon & Gold
         self.colors = {
             'primary': '#800000',  # Maroon
@@ -44,6 +1552,15 @@ class ModernLoginSystem:
         self.attachments_dir = 'student_attachments'
         if not os.path.exists(self.attachments_dir):
             os.makedirs(self.attachments_dir)
+        self.attachment_store = AttachmentStore(self.attachments_dir)
+        self.thumbnail_cache = ThumbnailCache(os.path.join(self.attachments_dir, '.thumbnails'),
+                                              self.THUMBNAIL_CACHE_MB * 1024 * 1024)
+        self.thumbnail_pool = ThreadPoolExecutor(max_workers=self.THUMBNAIL_WORKERS, thread_name_prefix="thumbnails")
+        # Resized logos; kept out of the thumbnail cache so its size limit never evicts them
+        self.logo_cache_dir = os.path.join(self.attachments_dir, '.logo_cache')
+        self.ingest_pool = ThreadPoolExecutor(max_workers=self.INGEST_WORKERS, thread_name_prefix="ingest")
+        # Timings of every statement on the app's connections, for Settings > Query Diagnostics
+        self.query_stats = QueryStats(self.SLOW_QUERY_MS, self.SLOW_QUERY_LOG)
         
         self.root = tk.Tk()
         self.root.title("St. Peter's College - Student Records Management System")
@@ -61,17 +1578,22 @@ class ModernLoginSystem:
         # Store mouse wheel bindings
         self.canvas_bindings = []
         
+        # Results of background jobs, handed back to the Tk thread by poll_ui_queue
+        self.ui_queue = queue.Queue()
+        self.pending_jobs = 0
+        self.root.after(self.UI_POLL_MS, self.poll_ui_queue)
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+        
         # Try to load SPC logo
         self.spc_logo = None
         try:
             if os.path.exists('SPC.png'):
-                img = Image.open('SPC.png')
-                img = img.resize((180, 180), Image.Resampling.LANCZOS)
-                self.spc_logo = ImageTk.PhotoImage(img)
+                self.spc_logo = load_logo_photo('SPC.png', (180, 180), self.logo_cache_dir)
         except Exception as e:
             print(f"Could not load logo: {e}")
         
-        # Initialize database
+        # Open the database in the background; Sign In is enabled once it is ready
+        self.startup_pending = {'database', 'login screen'}
         self.init_database()
         
         # Create login screen
@@ -79,13 +1601,32 @@ class ModernLoginSystem:
         
         # Center the window
         self.center_window()
+        mark_startup("login screen built")
+        
+        # Idle callbacks run once the window has been drawn
+        self.root.after_idle(lambda: self.startup_step_done('login screen', "login screen painted"))
         
         # Bind resize event
         self.root.bind('<Configure>', self.on_window_resize)
         
+        # Log what the Tk thread was doing whenever the window freezes
+        self.watchdog = StallWatchdog(self.root, self.STALL_LOG)
+        self.watchdog.start()
+        
         # Run the application
         self.root.mainloop()
     
+    def startup_step_done(self, step, stage):
+        """Mark a startup step finished; write the startup report once the window and database are both ready"""
+        mark_startup(stage)
+        self.startup_pending.discard(step)
+        if self.startup_pending:
+            return
+        try:
+            write_startup_report()
+        except OSError as e:
+            print(f"Could not write startup report: {e}")
+    
     def on_window_resize(self, event=None):
         """Handle window resize to adjust layout"""
         if hasattr(self, 'main_content'):
@@ -102,103 +1643,179 @@ class ModernLoginSystem:
         self.root.geometry(f'{width}x{height}+{x}+{y}')
     
     def init_database(self):
-        """Initialize database and create default admin"""
-        self.conn = sqlite3.connect('modern_users.db')
+        """Open the database and apply any pending schema migrations on a background thread"""
+        self.conn = None
+        self.cursor = None
+        self.students = None
+        self.db_worker = None
+        self.db_error = None
+        
+        # Cleared on the first search if this SQLite build has no FTS5
+        self.fts_enabled = True
+        
+        self.run_in_thread(open_database, 'modern_users.db', self.query_stats,
+                           on_done=self.database_ready, on_error=self.database_failed)
+    
+    def database_ready(self, conn):
+        """Take over the opened connection and enable signing in"""
+        self.conn = conn
         self.cursor = self.conn.cursor()
+        # All student record reads and writes on the Tk thread go through here
+        self.students = StudentRepository(conn, self.attachment_store, self.CRED_PAGE_SIZE, self.CRED_SEARCH_LIMIT)
         
-        # Create users table
-        self.cursor.execute('''
-            CREATE TABLE IF NOT EXISTS users (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                username TEXT UNIQUE NOT NULL,
-                password TEXT NOT NULL,
-                role TEXT DEFAULT 'user',
-                email TEXT,
-                full_name TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                last_login TIMESTAMP
-            )
-        ''')
-        
-        # Create credentials table (now for student records)
-        self.cursor.execute('''
-            CREATE TABLE IF NOT EXISTS credentials (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                title TEXT NOT NULL,
-                username TEXT NOT NULL,  -- Will store ID Number
-                password TEXT NOT NULL,  -- Will store First Name
-                attachments TEXT,        -- Will store JSON list of attachment paths
-                category TEXT DEFAULT 'Student',
-                first_name TEXT,
-                middle_name TEXT,
-                last_name TEXT,
-                owner_id INTEGER,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                -- Graduate-specific fields
-                last_school_year TEXT,
-                contact_number TEXT,
-                so_number TEXT,
-                date_issued TEXT,
-                series_year TEXT,
-                lrn TEXT,  -- ✅ ADDED LRN FIELD FOR GRADUATES
-                FOREIGN KEY (owner_id) REFERENCES users (id)
-            )
-        ''')
+        # Queries that could stall the window run here on their own connection
+        self.db_worker = DatabaseWorker('modern_users.db', self.query_stats)
         
-        # Check if attachments column exists, if not add it
-        try:
-            self.cursor.execute("SELECT attachments FROM credentials LIMIT 1")
-        except sqlite3.OperationalError:
-            # Column doesn't exist, add it
-            self.cursor.execute('ALTER TABLE credentials ADD COLUMN attachments TEXT')
-            print("✓ Added 'attachments' column to credentials table")
-        
-        # Check for other missing columns and add them if needed
-        columns_to_check = [
-            'first_name', 'middle_name', 'last_name',
-            'last_school_year', 'contact_number', 'so_number', 
-            'date_issued', 'series_year', 'lrn'  # ✅ ADDED LRN TO CHECK
-        ]
-        for column in columns_to_check:
-            try:
-                self.cursor.execute(f"SELECT {column} FROM credentials LIMIT 1")
-            except sqlite3.OperationalError:
-                self.cursor.execute(f'ALTER TABLE credentials ADD COLUMN {column} TEXT')
-                print(f"✓ Added '{column}' column to credentials table")
+        self.update_login_state()
+        self.startup_step_done('database', "database ready")
+    
+    def database_failed(self, error):
+        """Show a startup failure on the login screen, with a retry"""
+        self.db_error = error
+        self.update_login_state()
+        self.startup_step_done('database', "database failed")
+    
+    def retry_database(self):
+        """Try opening the database again after a startup failure"""
+        self.init_database()
+        self.update_login_state()
+    
+    def worker_students(self, cursor):
+        """StudentRepository on a database worker job's connection"""
+        return StudentRepository(cursor.connection, self.attachment_store, self.CRED_PAGE_SIZE, self.CRED_SEARCH_LIMIT)
+    
+    def ingest_attachments(self, files, on_done):
+        """Copy files into the blob store on the ingest pool, then call on_done(stored) on the Tk thread
         
-        # Create default admin user if not exists
-        default_admin_username = "admin"
-        default_admin_password = self.hash_password("Admin@123")
+        on_done only runs if every file was stored, so the caller can write the
+        record and its attachment rows in one commit. A progress dialog shows
+        each file while the forms stay responsive.
+        """
+        if not files:
+            on_done([])
+            return
         
-        self.cursor.execute("SELECT * FROM users WHERE username = ?", (default_admin_username,))
-        admin_exists = self.cursor.fetchone()
+        dialog, bar, status_label = self.open_progress_dialog("📎 Storing Attachments", "Preparing files...")
+        # Per-file (bytes_done, bytes_total), written by the pool threads
+        file_progress = [(0, 1)] * len(files)
+        results = [None] * len(files)
+        errors = []
+        state = {'finished': 0}
         
-        if not admin_exists:
-            self.cursor.execute('''
-                INSERT INTO users (username, password, role, email, full_name) 
-                VALUES (?, ?, ?, ?, ?)
-            ''', (default_admin_username, default_admin_password, 'admin', 
-                  'admin@system.com', 'System Administrator'))
-            
-            # Add some sample student records for admin
-            admin_id = self.cursor.lastrowid
-            sample_students = [
-                ('John Smith (S001)', 'S001', 'John', '[]', 'Active', 'John', '', 'Smith', admin_id, '', '', '', '', '', ''),
-                ('Jane Doe (S002)', 'S002', 'Jane', '[]', 'Active', 'Jane', '', 'Doe', admin_id, '', '', '', '', '', ''),
-                ('Robert Johnson (S003)', 'S003', 'Robert', '[]', 'Graduate', 'Robert', 'James', 'Johnson', admin_id, '2022-2023', '09123456789', 'SO-12345', '2023-04-15', '2023', '123456789012'),
-            ]
-            
-            for student in sample_students:
-                self.cursor.execute('''
-                    INSERT INTO credentials (title, username, password, attachments, category, first_name, middle_name, last_name, owner_id, last_school_year, contact_number, so_number, date_issued, series_year, lrn)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                ''', student)
+        def show_progress():
+            if state['finished'] == len(files) or not dialog.winfo_exists():
+                return
+            done = sum(d for d, _ in file_progress)
+            total = sum(t for _, t in file_progress)
+            bar['value'] = done * 100 / max(total, 1)
+            current = [os.path.basename(path) for path, (d, t) in zip(files, file_progress) if 0 < d < t]
+            status_label.config(text=f"{state['finished']} of {len(files)} file(s) stored"
+                                     + (f"\n{', '.join(current)[:60]}" if current else ""))
+            dialog.after(100, show_progress)
+        
+        def file_finished(index, stored=None, error=None):
+            results[index] = stored
+            if error is not None:
+                errors.append(f"{os.path.basename(files[index])}: {error}")
+            state['finished'] += 1
+            if state['finished'] < len(files):
+                return
             
-            self.conn.commit()
-            print("✓ Default admin created: username='admin', password='Admin@123'")
+            dialog.destroy()
+            if errors:
+                # Nothing was committed; drop files this save copied in
+                self.attachment_store.discard(self.cursor, [stored[0] for stored in results if stored])
+                messagebox.showerror("Attachment Error", "Failed to store attachment(s):\n" + "\n".join(errors))
+            else:
+                on_done(results)
+        
+        for index, path in enumerate(files):
+            def report(done, total, index=index):
+                file_progress[index] = (done, total)
+            self.run_in_pool(self.ingest_pool, self.attachment_store.ingest, path, None, report,
+                             on_done=lambda stored, index=index: file_finished(index, stored),
+                             on_error=lambda error, index=index: file_finished(index, error=error))
+        show_progress()
+    
+    def run_in_background(self, func, *args, on_done=None, on_error=None):
+        """Run func(cursor, *args) on the database worker and hand the result to on_done on the Tk thread"""
+        future = self.db_worker.submit(func, *args)
+        self.pending_jobs += 1
+        self.update_busy_indicator()
+        future.add_done_callback(lambda f: self.ui_queue.put((f, on_done, on_error)))
+        return future
+    
+    def run_in_pool(self, executor, func, *args, on_done=None, on_error=None):
+        """Run func(*args) on an executor; callbacks run on the Tk thread"""
+        future = executor.submit(func, *args)
+        self.pending_jobs += 1
+        self.update_busy_indicator()
+        future.add_done_callback(lambda f: self.ui_queue.put((f, on_done, on_error)))
+        return future
+    
+    def run_in_thread(self, func, *args, on_done=None, on_error=None):
+        """Run a long non-database job func(*args) on its own thread; callbacks run on the Tk thread"""
+        future = Future()
         
-        self.conn.commit()
+        def run():
+            if not future.set_running_or_notify_cancel():
+                return
+            try:
+                future.set_result(func(*args))
+            except BaseException as e:
+                future.set_exception(e)
+        
+        self.pending_jobs += 1
+        self.update_busy_indicator()
+        future.add_done_callback(lambda f: self.ui_queue.put((f, on_done, on_error)))
+        threading.Thread(target=run, daemon=True).start()
+        return future
+    
+    def poll_ui_queue(self):
+        """Deliver finished background jobs to their callbacks on the Tk thread"""
+        try:
+            while True:
+                future, on_done, on_error = self.ui_queue.get_nowait()
+                self.pending_jobs -= 1
+                try:
+                    if future.cancelled():
+                        continue
+                    error = future.exception()
+                    if error is not None:
+                        if on_error:
+                            on_error(error)
+                        else:
+                            messagebox.showerror("Database Error", f"Background query failed: {error}")
+                    elif on_done:
+                        on_done(future.result())
+                except Exception as e:
+                    print(f"Background job callback failed: {e}")
+        except queue.Empty:
+            pass
+        
+        self.update_busy_indicator()
+        self.root.after(self.UI_POLL_MS, self.poll_ui_queue)
+    
+    def update_busy_indicator(self):
+        """Show a busy cursor and navbar hint while background jobs are pending"""
+        busy = self.pending_jobs > 0
+        if getattr(self, 'busy_label', None) and self.busy_label.winfo_exists():
+            self.busy_label.config(text="⏳ Working..." if busy else "")
+        self.root.config(cursor='watch' if busy else '')
+    
+    def on_close(self):
+        """Stop the database worker and close the window"""
+        self.watchdog.stop()
+        self.thumbnail_pool.shutdown(wait=False, cancel_futures=True)
+        self.ingest_pool.shutdown(wait=False, cancel_futures=True)
+        if self.db_worker:
+            self.db_worker.close()
+        if self.conn:
+            try:
+                close_database(self.conn)
+            except sqlite3.Error as e:
+                print(f"Could not close database: {e}")
+        self.root.destroy()
     
     def hash_password(self, password):
         """Hash password using SHA-256"""
@@ -383,10 +2000,23 @@ class ModernLoginSystem:
             cursor='hand2',
             relief='raised'
         )
-        self.login_button.pack(pady=(10, 20))
+        self.login_button.pack(pady=(10, 0))
         self.login_button.bind('<Enter>', lambda e: self.on_button_hover(e, self.colors['hover']))
         self.login_button.bind('<Leave>', lambda e: self.on_button_leave(e, self.colors['primary']))
         
+        # Database startup progress and errors
+        self.login_status_label = tk.Label(
+            form_container,
+            text="",
+            font=('Arial', 10),
+            fg=self.colors['text'],
+            bg='white',
+            wraplength=400,
+            justify='center'
+        )
+        self.login_status_label.pack(pady=(10, 10))
+        self.update_login_state()
+        
         # Forgot password
         forgot_link = tk.Label(
             form_container,
@@ -404,6 +2034,23 @@ class ModernLoginSystem:
         # Bind Enter key
         self.root.bind('<Return>', lambda event: self.login())
     
+    def update_login_state(self):
+        """Enable Sign In once the database is open; otherwise show why not"""
+        if not getattr(self, 'login_button', None) or not self.login_button.winfo_exists():
+            return
+        if self.conn:
+            self.login_button.config(text="SIGN IN", state='normal', command=self.login)
+            self.login_status_label.config(text="")
+        elif self.db_error:
+            self.login_button.config(text="RETRY", state='normal', command=self.retry_database)
+            self.login_status_label.config(
+                text=f"⚠ Could not open the database:\n{self.db_error}",
+                fg=self.colors['danger']
+            )
+        else:
+            self.login_button.config(text="SIGN IN", state='disabled', command=self.login)
+            self.login_status_label.config(text="⏳ Opening database...", fg=self.colors['text'])
+    
     def on_entry_focus_in(self, frame):
         """Highlight entry field on focus"""
         frame.config(bg=self.colors['primary'])
@@ -438,6 +2085,10 @@ class ModernLoginSystem:
         username = self.username_entry.get().strip()
         password = self.password_entry.get().strip()
         
+        # The Enter key works before the database is open
+        if not self.conn:
+            return
+        
         if not username or not password:
             messagebox.showerror("Error", "Please enter both username and password")
             return
@@ -499,9 +2150,7 @@ class ModernLoginSystem:
         
         if self.spc_logo:
             # Resize logo for sidebar
-            small_logo = Image.open('SPC.png')
-            small_logo = small_logo.resize((80, 80), Image.Resampling.LANCZOS)
-            small_logo_tk = ImageTk.PhotoImage(small_logo)
+            small_logo_tk = load_logo_photo('SPC.png', (80, 80), self.logo_cache_dir)
             logo_label = tk.Label(sidebar_header, image=small_logo_tk, bg=self.colors['sidebar'])
             logo_label.image = small_logo_tk  # Keep reference
             logo_label.pack(pady=10)
@@ -610,6 +2259,16 @@ class ModernLoginSystem:
         user_info_frame = tk.Frame(self.navbar, bg=self.colors['navbar'])
         user_info_frame.pack(side=tk.RIGHT, padx=20)
         
+        # Busy indicator for background database work
+        self.busy_label = tk.Label(
+            self.navbar,
+            text="",
+            font=('Arial', 10),
+            fg=self.colors['secondary'],
+            bg=self.colors['navbar']
+        )
+        self.busy_label.pack(side=tk.RIGHT, padx=10)
+        
         # User avatar and name
         avatar_frame = tk.Frame(user_info_frame, bg=self.colors['navbar'], cursor='hand2')
         avatar_frame.pack(side=tk.LEFT, padx=10)
@@ -730,23 +2389,16 @@ class ModernLoginSystem:
         stats_frame = tk.Frame(scrollable_frame, bg=self.colors['light'])
         stats_frame.pack(fill=tk.X, padx=30, pady=(0, 30))
         
-        # Get user's student records count
-        self.cursor.execute('SELECT COUNT(*) FROM credentials WHERE owner_id = ?', (self.current_user,))
-        cred_count = self.cursor.fetchone()[0]
-        
-        # Get status distribution (changed from category)
-        self.cursor.execute('''SELECT category, COUNT(*) FROM credentials 
-                             WHERE owner_id = ? GROUP BY category''', (self.current_user,))
-        status_stats = self.cursor.fetchall()
-        
+        # Counts are filled in when the background statistics query returns
         stats_data = [
-            ("Total Students", str(cred_count), self.colors['primary'], "👨‍🎓"),
-            ("Active Students", str(sum(1 for cat, count in status_stats if cat == 'Active')), self.colors['success'], "✅"),
-            ("Graduates", str(sum(1 for cat, count in status_stats if cat == 'Graduate')), self.colors['info'], "🎓"),
-            ("Inactive", str(sum(1 for cat, count in status_stats if cat == 'Inactive')), self.colors['warning'], "⏸️"),
+            ("Total Students", None, self.colors['primary'], "👨‍🎓"),
+            ("Active Students", 'Active', self.colors['success'], "✅"),
+            ("Graduates", 'Graduate', self.colors['info'], "🎓"),
+            ("Inactive", 'Inactive', self.colors['warning'], "⏸️"),
         ]
+        stat_labels = {}
         
-        for title, value, color, icon in stats_data:
+        for title, status_key, color, icon in stats_data:
             card = tk.Frame(stats_frame, bg='white', height=120, relief='solid', bd=1)
             card.pack(side=tk.LEFT, fill=tk.BOTH, expand=True, padx=(0, 20))
             
@@ -772,13 +2424,15 @@ class ModernLoginSystem:
             ).pack(side=tk.LEFT)
             
             # Card content
-            tk.Label(
+            value_label = tk.Label(
                 card,
-                text=value,
+                text="…",
                 font=('Arial', 28, 'bold'),
                 bg='white',
                 fg=self.colors['dark']
-            ).pack(expand=True)
+            )
+            value_label.pack(expand=True)
+            stat_labels[status_key] = value_label
             
             tk.Label(
                 card,
@@ -809,51 +2463,71 @@ class ModernLoginSystem:
         activity_content = tk.Frame(activity_frame, bg='white', padx=20, pady=20)
         activity_content.pack(fill=tk.BOTH, expand=True)
         
-        # Get recent student records
-        self.cursor.execute('''SELECT first_name, last_name, category, updated_at 
-                             FROM credentials WHERE owner_id = ? 
-                             ORDER BY updated_at DESC LIMIT 5''', (self.current_user,))
-        recent_students = self.cursor.fetchall()
-        
-        if recent_students:
-            for i, (fname, lname, status, updated) in enumerate(recent_students):
-                row_frame = tk.Frame(activity_content, bg='white')
-                row_frame.pack(fill=tk.X, pady=5)
+        activity_loading = tk.Label(
+            activity_content,
+            text="Loading...",
+            font=('Arial', 12),
+            bg='white',
+            fg=self.colors['text']
+        )
+        activity_loading.pack(pady=20)
+        
+        def show_dashboard_data(result):
+            """Fill in the stat cards and Recent Activity once the queries return"""
+            status_stats, recent_students = result
+            if not activity_content.winfo_exists():
+                return  # Navigated away before the data arrived
+            
+            status_counts = dict(status_stats)
+            for status_key, value_label in stat_labels.items():
+                if status_key is None:
+                    value_label.config(text=str(sum(status_counts.values())))
+                else:
+                    value_label.config(text=str(status_counts.get(status_key, 0)))
+            
+            activity_loading.destroy()
+            if recent_students:
+                for i, (fname, lname, status, updated) in enumerate(recent_students):
+                    row_frame = tk.Frame(activity_content, bg='white')
+                    row_frame.pack(fill=tk.X, pady=5)
                 
-                tk.Label(
-                    row_frame,
-                    text=f"👤 {fname} {lname}",
-                    font=('Arial', 11),
-                    bg='white',
-                    fg=self.colors['dark'],
-                    anchor='w'
-                ).pack(side=tk.LEFT, padx=10)
+                    tk.Label(
+                        row_frame,
+                        text=f"👤 {fname} {lname}",
+                        font=('Arial', 11),
+                        bg='white',
+                        fg=self.colors['dark'],
+                        anchor='w'
+                    ).pack(side=tk.LEFT, padx=10)
                 
-                tk.Label(
-                    row_frame,
-                    text=f"({status})",
-                    font=('Arial', 10),
-                    bg='white',
-                    fg=self.colors['text'],
-                    anchor='w'
-                ).pack(side=tk.LEFT, padx=10)
+                    tk.Label(
+                        row_frame,
+                        text=f"({status})",
+                        font=('Arial', 10),
+                        bg='white',
+                        fg=self.colors['text'],
+                        anchor='w'
+                    ).pack(side=tk.LEFT, padx=10)
                 
+                    tk.Label(
+                        row_frame,
+                        text=f"Updated: {updated[:10] if updated else 'N/A'}",
+                        font=('Arial', 9),
+                        bg='white',
+                        fg=self.colors['text'],
+                        anchor='w'
+                    ).pack(side=tk.RIGHT, padx=10)
+            else:
                 tk.Label(
-                    row_frame,
-                    text=f"Updated: {updated[:10] if updated else 'N/A'}",
-                    font=('Arial', 9),
+                    activity_content,
+                    text="No recent activity",
+                    font=('Arial', 12),
                     bg='white',
-                    fg=self.colors['text'],
-                    anchor='w'
-                ).pack(side=tk.RIGHT, padx=10)
-        else:
-            tk.Label(
-                activity_content,
-                text="No recent activity",
-                font=('Arial', 12),
-                bg='white',
-                fg=self.colors['text']
-            ).pack(pady=20)
+                    fg=self.colors['text']
+                ).pack(pady=20)
+        
+        # Get statistics and recent student records without blocking the window
+        self.run_in_background(self.query_dashboard_data, self.current_user, on_done=show_dashboard_data)
         
         # Quick actions
         quick_actions_frame = tk.Frame(scrollable_frame, bg=self.colors['light'])
@@ -869,6 +2543,7 @@ class ModernLoginSystem:
         
         action_buttons = [
             ("➕ Add New Student", self.add_new_credential, self.colors['primary']),
+            ("📥 Import from CSV", self.import_students_csv, self.colors['accent']),
             ("📤 Export Records", self.export_options, self.colors['success']),
             ("📊 Generate Report", self.generate_report, self.colors['info']),
             ("⚙️ System Settings", self.show_settings, self.colors['warning'])
@@ -921,6 +2596,11 @@ class ModernLoginSystem:
         # Update immediately
         configure_scrollregion()
     
+    def query_dashboard_data(self, cursor, owner_id):
+        """Background job: status counts and the five most recently updated records"""
+        students = self.worker_students(cursor)
+        return students.stats(owner_id), students.recent(owner_id, 5)
+    
     def darken_color(self, color):
         """Darken color for hover effect"""
         if color == self.colors['primary']:
@@ -1024,7 +2704,7 @@ class ModernLoginSystem:
         search_entry.insert(0, "Search student records...")
         search_entry.bind('<FocusIn>', lambda e: search_entry.delete(0, tk.END) if search_entry.get() == "Search student records..." else None)
         search_entry.bind('<FocusOut>', lambda e: search_entry.insert(0, "Search student records...") if not search_entry.get() else None)
-        search_entry.bind('<KeyRelease>', lambda e: self.filter_credentials())
+        search_entry.bind('<KeyRelease>', lambda e: self.schedule_search())
         
         # Status filter (changed from Category)
         statuses = ['All', 'Active', 'Graduate', 'Inactive']  # Changed options
@@ -1050,6 +2730,16 @@ class ModernLoginSystem:
         status_menu.pack(side=tk.LEFT)
         status_menu.bind('<<ComboboxSelected>>', lambda e: self.filter_credentials())
         
+        # Total number of matching records (the list itself is loaded page by page)
+        self.cred_count_label = tk.Label(
+            filter_frame,
+            text="",
+            font=('Arial', 10),
+            bg=self.colors['light'],
+            fg=self.colors['text']
+        )
+        self.cred_count_label.pack(side=tk.LEFT, padx=(20, 0))
+        
         # Student records list frame
         list_frame = tk.Frame(scrollable_frame, bg=self.colors['light'])
         list_frame.pack(fill=tk.BOTH, expand=True, padx=30, pady=(0, 30))
@@ -1087,8 +2777,15 @@ class ModernLoginSystem:
         style.configure("Treeview.Heading", font=('Arial', 10, 'bold'), background=self.colors['primary'], foreground='black')
         
         # Add scrollbar to treeview
+        # Only a window of rows is kept in the tree; more are paged in as it scrolls
         tree_scrollbar = ttk.Scrollbar(list_frame, orient='vertical', command=self.cred_tree.yview)
-        self.cred_tree.configure(yscrollcommand=tree_scrollbar.set)
+        self.cred_scrollbar = tree_scrollbar
+        self.cred_paging = False
+        self.cred_more_above = False
+        self.cred_more_below = False
+        self.cred_keys = {}
+        self.cred_total = 0
+        self.cred_tree.configure(yscrollcommand=self.on_cred_tree_scroll)
         
         # Pack treeview and scrollbar
         self.cred_tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
@@ -1103,6 +2800,7 @@ class ModernLoginSystem:
             ("✏️ Edit", self.edit_credential),
             ("🗑️ Delete", self.delete_credential),
             ("📁 Open Attachments", self.open_attachments),
+            ("📥 Import CSV", self.import_students_csv),
             ("📤 Export", self.export_options)
         ]
         
@@ -1163,55 +2861,239 @@ class ModernLoginSystem:
         configure_scrollregion()
     
     def load_credentials(self, search_text="", status="All"):  # Changed parameter name
-        """Load student records from database"""
-        # Clear existing items
-        for item in self.cred_tree.get_children():
-            self.cred_tree.delete(item)
-        
-        # Build query
-        query = '''
-            SELECT id, username, password, last_name, category, attachments, updated_at 
-            FROM credentials 
-            WHERE owner_id = ?
-        '''
-        params = [self.current_user]
-        
-        if search_text and search_text != "Search student records...":
-            query += " AND (title LIKE ? OR username LIKE ? OR password LIKE ? OR last_name LIKE ? OR first_name LIKE ? OR middle_name LIKE ?)"
-            search_pattern = f"%{search_text}%"
-            params.extend([search_pattern, search_pattern, search_pattern, search_pattern, 
-                          search_pattern, search_pattern])
-        
-        if status != "All":  # Changed from category
-            query += " AND category = ?"
-            params.append(status)
-        
-        query += " ORDER BY updated_at DESC"
-        
-        # Execute query
-        self.cursor.execute(query, params)
-        credentials = self.cursor.fetchall()
-        
-        # Add to treeview
-        for cred in credentials:
-            cred_id, id_number, first_name, last_name, status, attachments_json, updated_at = cred
+        """Load the first page of student records into the virtual list (queried in the background)"""
+        filter_text = "" if search_text == "Search student records..." else search_text
+        self.cred_filter = self.students.build_filter(self.current_user, filter_text, status, self.fts_enabled)
+        ranked = self.cred_filter['ranked']
+        
+        # Results of an older load (or a page request for it) are dropped when they arrive,
+        # and its query is cancelled so the worker moves straight on to this one
+        self.cancel_credentials_job()
+        self.cred_load_id = getattr(self, 'cred_load_id', 0) + 1
+        load_id = self.cred_load_id
+        self.cred_paging = True
+        self.cred_filter_key = (search_text, status)
+        
+        def show_first_page(result):
+            credentials, total = result
+            if load_id != self.cred_load_id or not self.cred_tree.winfo_exists():
+                return
             
-            # Parse attachments JSON
-            try:
-                attachments = json.loads(attachments_json) if attachments_json else []
-            except:
-                attachments = []
+            # Rows already in the tree are kept and only patched/moved where they changed
+            self.apply_credentials_diff(credentials)
             
-            # Display attachment count
-            if attachments:
-                display_attachments = f"{len(attachments)} file(s)"
+            # Ranked search results are a single capped page; browsing pages by keyset
+            self.cred_more_above = False
+            self.cred_more_below = not ranked and len(credentials) == self.CRED_PAGE_SIZE
+            self.cred_paging = False
+            self.cred_total = total
+            self.update_credentials_count()
+        
+        def load_failed(error):
+            if load_id != self.cred_load_id:
+                # Includes queries interrupted by a newer search
+                return
+            self.cred_paging = False
+            if ranked and 'credentials_fts' in str(error):
+                # No full-text index in this database - retry with LIKE matching
+                self.fts_enabled = False
+                self.load_credentials(search_text, status)
             else:
-                display_attachments = "No attachments"
-            
-            self.cred_tree.insert('', 'end', values=(cred_id, id_number, first_name, last_name, status, display_attachments, updated_at))
+                messagebox.showerror("Database Error", f"Failed to load student records: {error}")
+        
+        # Execute query
+        self.cred_job = self.run_in_background(
+            self.query_credentials_first_page, self.cred_filter,
+            on_done=show_first_page, on_error=load_failed
+        )
+    
+    def query_credentials_first_page(self, cursor, cred_filter):
+        """Background job: first list page plus the total number of matches"""
+        students = self.worker_students(cursor)
+        return students.search(cred_filter), students.count(cred_filter)
+    
+    def query_credentials_count(self, cursor, cred_filter):
+        """Background job: the number of records matching the list filter"""
+        return self.worker_students(cursor).count(cred_filter)
+    
+    def fetch_credentials_page(self, cursor, cred_filter, older_than=None, newer_than=None):
+        """Background job: the page of list rows beyond either end of the loaded window"""
+        return self.worker_students(cursor).search(cred_filter, older_than, newer_than)
+    
+    def insert_credential_row(self, cred, index='end'):
+        """Insert or patch one list row in the student records Treeview (item id = record id)"""
+        cred_id, id_number, first_name, last_name, status, attachment_count, updated_at = cred
+        
+        # Display attachment count
+        if attachment_count:
+            display_attachments = f"{attachment_count} file(s)"
+        else:
+            display_attachments = "No attachments"
+        
+        values = (cred_id, id_number, first_name, last_name, status, display_attachments, updated_at)
+        item = str(cred_id)
+        if self.cred_tree.exists(item):
+            # Only touch the widget where the row actually changed
+            if tuple(map(str, self.cred_tree.item(item, 'values'))) != tuple(map(str, values)):
+                self.cred_tree.item(item, values=values)
+            if index == 'end' or self.cred_tree.index(item) != index:
+                self.cred_tree.move(item, '', index)
+        else:
+            self.cred_tree.insert('', index, iid=item, values=values)
+        self.cred_keys[item] = (updated_at, cred_id)
+        return item
+    
+    def remove_credential_rows(self, items):
+        """Delete rows from the student records Treeview"""
+        items = [item for item in items if self.cred_tree.exists(item)]
+        if items:
+            self.cred_tree.delete(*items)
+        for item in items:
+            self.cred_keys.pop(item, None)
+    
+    def apply_credentials_diff(self, credentials):
+        """Make the Treeview show exactly these rows with the fewest inserts, moves and deletes"""
+        wanted = {str(cred[0]) for cred in credentials}
+        self.remove_credential_rows([item for item in self.cred_tree.get_children() if item not in wanted])
+        
+        for index, cred in enumerate(credentials):
+            self.insert_credential_row(cred, index)
+    
+    def update_credentials_count(self):
+        """Show the number of matching records next to the filters"""
+        shown = len(self.cred_tree.get_children())
+        if self.cred_filter['ranked'] and self.cred_total > shown:
+            self.cred_count_label.config(text=f"Top {shown:,} of {self.cred_total:,} matching records")
+        else:
+            self.cred_count_label.config(text=f"{self.cred_total:,} student record(s)")
+    
+    def refresh_credential_row(self, cred_id):
+        """Patch a single added/edited/deleted record into the list instead of reloading it"""
+        if not getattr(self, 'cred_tree', None) or not self.cred_tree.winfo_exists():
+            # Saved from outside the list screen - open it as before
+            self.show_credentials()
+            return
+        
+        # Does the record (still) match the active filter? Served by the primary key
+        matches = self.students.get_many(self.current_user, [cred_id], self.cred_filter)
+        cred = matches[0] if matches else None
+        
+        item = str(cred_id)
+        was_listed = item in self.cred_keys
+        
+        if cred and (self.cred_filter['ranked'] or not self.cred_more_above):
+            # Just written, so it is the newest row: top of the list (ranked results keep their place)
+            self.insert_credential_row(cred, self.cred_tree.index(item) if was_listed and self.cred_filter['ranked'] else 0)
+        else:
+            # Filtered out, or it now sorts above the loaded window
+            self.remove_credential_rows([item])
+        
+        self.update_credentials_count()
+        
+        # Whether the record was listed says nothing about whether it was counted (the
+        # window holds only a few pages), so the total is counted again for the same filter
+        load_id = self.cred_load_id
+        
+        def show_total(total):
+            if load_id != self.cred_load_id or not self.cred_tree.winfo_exists():
+                return
+            self.cred_total = total
+            self.update_credentials_count()
+        
+        self.run_in_background(
+            self.query_credentials_count, self.cred_filter,
+            on_done=show_total, on_error=lambda error: None  # Keep the last total; the next load recounts
+        )
+    
+    def on_cred_tree_scroll(self, first, last):
+        """Treeview scroll callback: page rows in near either end of the loaded window"""
+        self.cred_scrollbar.set(first, last)
+        if self.cred_paging:
+            return
+        
+        if float(last) > 0.9 and self.cred_more_below:
+            self.load_credentials_page(older=True)
+        elif float(first) < 0.1 and self.cred_more_above:
+            self.load_credentials_page(older=False)
+    
+    def load_credentials_page(self, older=True):
+        """Request the next page beyond either end of the loaded window"""
+        children = self.cred_tree.get_children()
+        if not children:
+            return
+        
+        load_id = self.cred_load_id
+        
+        def page_loaded(rows):
+            if load_id == self.cred_load_id and self.cred_tree.winfo_exists():
+                self.extend_credentials_window(rows, older)
+                self.cred_paging = False
+        
+        def page_failed(error):
+            if load_id == self.cred_load_id:
+                self.cred_paging = False
+        
+        self.cred_paging = True
+        if older:
+            keys = (self.cred_keys[children[-1]], None)
+        else:
+            keys = (None, self.cred_keys[children[0]])
+        self.cred_job = self.run_in_background(self.fetch_credentials_page, self.cred_filter, *keys,
+                                               on_done=page_loaded, on_error=page_failed)
+    
+    def extend_credentials_window(self, rows, older):
+        """Add a fetched page to the loaded window and trim the far end to keep it bounded"""
+        children = self.cred_tree.get_children()
+        max_rows = self.CRED_PAGE_SIZE * self.CRED_WINDOW_PAGES
+        
+        if older:
+            for cred in rows:
+                self.insert_credential_row(cred)
+            self.cred_more_below = len(rows) == self.CRED_PAGE_SIZE
+            
+            overflow = len(children) + len(rows) - max_rows
+            if overflow > 0:
+                self.remove_credential_rows(children[:overflow])
+                self.cred_more_above = True
+                # Rows vanished above the view; scroll back so the visible rows stay put
+                self.cred_tree.yview_scroll(-overflow, 'units')
+        else:
+            for index, cred in enumerate(rows):
+                self.insert_credential_row(cred, index)
+            self.cred_more_above = len(rows) == self.CRED_PAGE_SIZE
+            
+            overflow = len(children) + len(rows) - max_rows
+            if overflow > 0:
+                self.remove_credential_rows(children[-overflow:])
+                self.cred_more_below = True
+            # Rows were added above the view; scroll down so the visible rows stay put
+            self.cred_tree.yview_scroll(len(rows), 'units')
+    
+    def cancel_credentials_job(self):
+        """Cancel the list query or page request still in flight, if any"""
+        job = getattr(self, 'cred_job', None)
+        if job is not None and not job.done():
+            self.db_worker.cancel(job)
+        self.cred_job = None
+    
+    def schedule_search(self):
+        """Search as you type: run the filter once typing pauses for SEARCH_DEBOUNCE_MS"""
+        if getattr(self, 'search_after_id', None):
+            self.root.after_cancel(self.search_after_id)
+        self.search_after_id = self.root.after(self.SEARCH_DEBOUNCE_MS, self.run_scheduled_search)
+    
+    def run_scheduled_search(self):
+        """Debounce timer callback: skip keys that did not change the search (arrows, shift...)"""
+        self.search_after_id = None
+        if (self.search_var.get(), self.status_var.get()) != getattr(self, 'cred_filter_key', None):
+            self.filter_credentials()
     
     def filter_credentials(self):
         """Filter student records based on search and status"""
+        if getattr(self, 'search_after_id', None):
+            # Run now instead of when the pending keystroke timer fires
+            self.root.after_cancel(self.search_after_id)
+            self.search_after_id = None
         search_text = self.search_var.get()
         status = self.status_var.get()  # Changed variable name
         self.load_credentials(search_text, status)
@@ -1256,7 +3138,8 @@ class ModernLoginSystem:
             ("📋 Export All Records (PDF)", self.export_all_to_pdf),
             ("📄 Export Selected Record (PDF)", self.export_selected_to_pdf),
             ("📊 Export Statistics (PDF)", self.export_statistics_to_pdf),
-            ("📁 Export with Images (PDF)", self.export_with_images_to_pdf)
+            ("📁 Export with Images (PDF)", self.export_with_images_to_pdf),
+            ("🎓 Batch Export (PDF per Student)", self.batch_export_students)
         ]
         
         for btn_text, command in options:
@@ -1301,128 +3184,56 @@ class ModernLoginSystem:
     
     def export_all_to_pdf(self):
         """Export all student records to PDF"""
-        try:
-            # Get all student records
-            self.cursor.execute('''
-                SELECT id, username, password, last_name, category, first_name, middle_name, last_name, created_at, updated_at 
-                FROM credentials 
-                WHERE owner_id = ?
-                ORDER BY last_name, first_name
-            ''', (self.current_user,))
-            
-            students = self.cursor.fetchall()
-            
-            if not students:
-                messagebox.showwarning("No Data", "No student records to export")
-                return
-            
-            # Ask for save location
-            file_path = filedialog.asksaveasfilename(
-                defaultextension=".pdf",
-                filetypes=[("PDF files", "*.pdf"), ("All files", "*.*")],
-                initialfile=f"student_records_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf"
-            )
-            
-            if not file_path:
+        total = sum(count for status, count in self.students.stats(self.current_user))
+        if not total:
+            messagebox.showwarning("No Data", "No student records to export")
+            return
+        
+        # Ask for save location
+        file_path = filedialog.asksaveasfilename(
+            defaultextension=".pdf",
+            filetypes=[("PDF files", "*.pdf"), ("All files", "*.*")],
+            initialfile=f"student_records_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf"
+        )
+        
+        if not file_path:
+            return
+        
+        # The report is streamed page by page on the database worker
+        dialog, bar, status_label = self.open_progress_dialog("📋 Exporting Records", "Writing PDF...")
+        state = {'progress': (0, total), 'done': False}
+        
+        def show_progress():
+            if state['done'] or not dialog.winfo_exists():
                 return
-            
-            # Create PDF document
-            doc = SimpleDocTemplate(file_path, pagesize=A4)
-            elements = []
-            
-            # Get styles
-            styles = getSampleStyleSheet()
-            
-            # Title
-            title_style = ParagraphStyle(
-                'CustomTitle',
-                parent=styles['Heading1'],
-                fontSize=20,
-                textColor=colors.HexColor('#800000'),  # Maroon
-                spaceAfter=30
-            )
-            
-            title = Paragraph("Student Records Report", title_style)
-            elements.append(title)
-            
-            # Subtitle
-            subtitle_style = ParagraphStyle(
-                'CustomSubtitle',
-                parent=styles['Normal'],
-                fontSize=12,
-                textColor=colors.HexColor('#666666'),
-                spaceAfter=20
-            )
-            
-            subtitle = Paragraph(f"Generated on: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}<br/>Total Records: {len(students)}", subtitle_style)
-            elements.append(subtitle)
-            
-            elements.append(Spacer(1, 20))
-            
-            # Create table data
-            table_data = [['ID', 'ID Number', 'Full Name', 'Status', 'Created', 'Updated']]  # Changed column name
-            
-            for student in students:
-                cred_id, id_number, first_name, last_name, status, fname, mname, lname, created_at, updated_at = student
-                
-                # Format name
-                full_name = f"{first_name} {mname + ' ' if mname else ''}{last_name}".strip()
-                
-                # Format dates
-                created_date = created_at[:10] if created_at else "N/A"
-                updated_date = updated_at[:10] if updated_at else "N/A"
-                
-                table_data.append([str(cred_id), id_number, full_name, status, created_date, updated_date])  # Changed column
-            
-            # Create table
-            table = Table(table_data, colWidths=[0.5*inch, 1*inch, 2.5*inch, 1*inch, 1*inch, 1*inch])
-            
-            # Style the table
-            table.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#800000')),  # Maroon
-                ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-                ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                ('FONTSIZE', (0, 0), (-1, 0), 12),
-                ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-                ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-                ('GRID', (0, 0), (-1, -1), 1, colors.black),
-                ('FONTSIZE', (0, 1), (-1, -1), 10),
-                ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-            ]))
-            
-            elements.append(table)
-            elements.append(Spacer(1, 30))
-            
-            # Add summary
-            summary_style = ParagraphStyle(
-                'Summary',
-                parent=styles['Normal'],
-                fontSize=10,
-                textColor=colors.HexColor('#333333'),
-                spaceAfter=10
-            )
-            
-            # Count by status (changed from category)
-            statuses = {}
-            for student in students:
-                status = student[4]  # Changed from category
-                statuses[status] = statuses.get(status, 0) + 1
-            
-            summary_text = "Summary by Status:<br/>"  # Changed text
-            for status, count in statuses.items():
-                summary_text += f"• {status}: {count} student(s)<br/>"
-            
-            summary = Paragraph(summary_text, summary_style)
-            elements.append(summary)
-            
-            # Build PDF
-            doc.build(elements)
-            
-            messagebox.showinfo("Success", f"PDF exported successfully!\nSaved to: {file_path}")
-            
-        except Exception as e:
-            messagebox.showerror("Export Error", f"Failed to export PDF: {str(e)}")
+            written, total_rows = state['progress']
+            bar['value'] = written * 100 / max(total_rows, 1)
+            status_label.config(text=f"{written:,} of {total_rows:,} records written")
+            dialog.after(100, show_progress)
+        
+        def export_done(written):
+            state['done'] = True
+            dialog.destroy()
+            messagebox.showinfo("Success", f"PDF exported successfully!\n{written:,} record(s)\nSaved to: {file_path}")
+        
+        def export_failed(error):
+            state['done'] = True
+            dialog.destroy()
+            self.export_failed(error)
+        
+        show_progress()
+        self.run_in_background(self.export_roster_job, file_path, self.current_user, state,
+                               on_done=export_done, on_error=export_failed)
+    
+    def export_failed(self, error):
+        """Report a failed background export query"""
+        messagebox.showerror("Export Error", f"Failed to export PDF: {str(error)}")
+    
+    def export_roster_job(self, cursor, file_path, owner_id, state):
+        """Background job: stream the all-records report on the worker connection"""
+        def report(written, total):
+            state['progress'] = (written, total)
+        return stream_roster_pdf(cursor.connection, owner_id, file_path, progress=report)
     
     def export_selected_to_pdf(self):
         """Export selected student record to PDF"""
@@ -1435,20 +3246,20 @@ class ModernLoginSystem:
         cred_id = item['values'][0]
         
         # Get student record details
-        self.cursor.execute('''
-            SELECT title, username, password, attachments, category, first_name, middle_name, last_name, created_at, updated_at, 
-                   last_school_year, contact_number, so_number, date_issued, series_year, lrn
-            FROM credentials 
-            WHERE id = ? AND owner_id = ?
-        ''', (cred_id, self.current_user))
-        
-        student = self.cursor.fetchone()
-        
+        self.run_in_background(self.query_student_record, cred_id, self.current_user,
+                               on_done=self.write_student_record_pdf, on_error=self.export_failed)
+    
+    def query_student_record(self, cursor, cred_id, owner_id):
+        """Background job: full details of one student record"""
+        return self.worker_students(cursor).get_records(owner_id, [cred_id]).get(cred_id)
+    
+    def write_student_record_pdf(self, student):
+        """Write the single student record PDF"""
         if not student:
             messagebox.showerror("Error", "Student record not found")
             return
         
-        title, id_number, first_name, attachments_json, status, fname, mname, lname, created_at, updated_at, last_school_year, contact_number, so_number, date_issued, series_year, lrn = student
+        id_number = student[1]
         
         try:
             # Ask for save location
@@ -1461,264 +3272,181 @@ class ModernLoginSystem:
             if not file_path:
                 return
             
-            # Create PDF document
-            doc = SimpleDocTemplate(file_path, pagesize=A4)
-            elements = []
-            
-            # Get styles
-            styles = getSampleStyleSheet()
-            
-            # Title
-            title_style = ParagraphStyle(
-                'CustomTitle',
-                parent=styles['Heading1'],
-                fontSize=20,
-                textColor=colors.HexColor('#800000'),  # Maroon
-                spaceAfter=30
-            )
-            
-            pdf_title = Paragraph(f"Student Record: {title}", title_style)
-            elements.append(pdf_title)
-            
-            # Subtitle
-            subtitle_style = ParagraphStyle(
-                'CustomSubtitle',
-                parent=styles['Normal'],
-                fontSize=12,
-                textColor=colors.HexColor('#666666'),
-                spaceAfter=20
-            )
-            
-            subtitle = Paragraph(f"Generated on: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}", subtitle_style)
-            elements.append(subtitle)
-            
-            elements.append(Spacer(1, 30))
-            
-            # Student Information Table
-            info_data = [
-                ['Field', 'Value'],
-                ['ID Number', id_number],
-                ['First Name', first_name],
-                ['Middle Name', mname if mname else 'N/A'],
-                ['Last Name', lname],
-                ['Status', status],  # Changed label
-                ['Created Date', created_at[:10] if created_at else 'N/A'],
-                ['Last Updated', updated_at[:10] if updated_at else 'N/A']
-            ]
-            
-            # Add graduate-specific fields if status is Graduate
-            if status == 'Graduate':
-                info_data.extend([
-                    ['Last School Year Attended', last_school_year if last_school_year else 'N/A'],
-                    ['Contact Number', contact_number if contact_number else 'N/A'],
-                    ['SO Number', so_number if so_number else 'N/A'],
-                    ['Date Issued', date_issued if date_issued else 'N/A'],
-                    ['Series of Year', series_year if series_year else 'N/A'],
-                    ['LRN (Learner Reference Number)', lrn if lrn else 'N/A']  # ✅ ADDED LRN
-                ])
-            
-            info_table = Table(info_data, colWidths=[2*inch, 4*inch])
-            info_table.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#800000')),  # Maroon
-                ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-                ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                ('FONTSIZE', (0, 0), (-1, 0), 12),
-                ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-                ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-                ('GRID', (0, 0), (-1, -1), 1, colors.black),
-                ('FONTSIZE', (0, 1), (-1, -1), 10),
-                ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-            ]))
-            
-            elements.append(info_table)
-            elements.append(Spacer(1, 30))
-            
-            # Footer
-            footer_style = ParagraphStyle(
-                'Footer',
-                parent=styles['Normal'],
-                fontSize=9,
-                textColor=colors.HexColor('#999999'),
-                alignment=1
-            )
-            
-            footer = Paragraph(f"Confidential Student Record - St. Peter's College Student Records System", footer_style)
-            elements.append(footer)
-            
-            # Build PDF
-            doc.build(elements)
+            render_student_pdf(student, file_path)
             
             messagebox.showinfo("Success", f"Student record exported successfully!\nSaved to: {file_path}")
             
         except Exception as e:
             messagebox.showerror("Export Error", f"Failed to export PDF: {str(e)}")
     
-    def export_statistics_to_pdf(self):
-        """Export system statistics to PDF"""
-        try:
-            # Get statistics
-            self.cursor.execute('SELECT COUNT(*) FROM credentials WHERE owner_id = ?', (self.current_user,))
-            total_students = self.cursor.fetchone()[0]
-            
-            self.cursor.execute('''
-                SELECT category, COUNT(*) as count 
-                FROM credentials 
-                WHERE owner_id = ?
-                GROUP BY category 
-                ORDER BY count DESC
-            ''', (self.current_user,))
-            
-            status_stats = self.cursor.fetchall()
-            
-            self.cursor.execute('''
-                SELECT strftime('%Y-%m', created_at) as month, COUNT(*) as count
-                FROM credentials 
-                WHERE owner_id = ?
-                GROUP BY month
-                ORDER BY month DESC
-                LIMIT 6
-            ''', (self.current_user,))
-            
-            monthly_stats = self.cursor.fetchall()
-            
-            # Ask for save location
-            file_path = filedialog.asksaveasfilename(
-                defaultextension=".pdf",
-                filetypes=[("PDF files", "*.pdf"), ("All files", "*.*")],
-                initialfile=f"student_statistics_{datetime.now().strftime('%Y%m%d')}.pdf"
-            )
-            
-            if not file_path:
-                return
-            
-            # Create PDF document
-            doc = SimpleDocTemplate(file_path, pagesize=A4)
-            elements = []
-            
-            # Get styles
-            styles = getSampleStyleSheet()
-            
-            # Title
-            title_style = ParagraphStyle(
-                'CustomTitle',
-                parent=styles['Heading1'],
-                fontSize=20,
-                textColor=colors.HexColor('#800000'),  # Maroon
-                spaceAfter=30
-            )
-            
-            title = Paragraph("Student Records Statistics Report", title_style)
-            elements.append(title)
-            
-            # Subtitle
-            subtitle_style = ParagraphStyle(
-                'CustomSubtitle',
-                parent=styles['Normal'],
-                fontSize=12,
-                textColor=colors.HexColor('#666666'),
-                spaceAfter=20
-            )
-            
-            subtitle = Paragraph(f"Generated on: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}", subtitle_style)
-            elements.append(subtitle)
-            
-            elements.append(Spacer(1, 30))
-            
-            # Summary Statistics
-            summary_style = ParagraphStyle(
-                'Summary',
-                parent=styles['Heading2'],
-                fontSize=16,
-                textColor=colors.HexColor('#333333'),
-                spaceAfter=15
-            )
-            
-            summary = Paragraph(f"Total Students: {total_students}", summary_style)
-            elements.append(summary)
-            elements.append(Spacer(1, 20))
+    def batch_export_students(self):
+        """Export one PDF per student matching a filter, rendered in parallel"""
+        dialog = tk.Toplevel(self.root)
+        dialog.title("Batch Export")
+        dialog.geometry("420x400")
+        dialog.configure(bg=self.colors['background'])
+        dialog.transient(self.root)
+        dialog.grab_set()
+        dialog.resizable(False, False)
+        
+        tk.Label(
+            dialog,
+            text="🎓 Batch Export",
+            font=('Arial', 18, 'bold'),
+            fg=self.colors['primary'],
+            bg=self.colors['background']
+        ).pack(pady=(20, 15))
+        
+        form = tk.Frame(dialog, bg=self.colors['background'])
+        form.pack(padx=30, fill=tk.X)
+        
+        status_var = tk.StringVar(value='Graduate')
+        school_year_var = tk.StringVar()
+        series_year_var = tk.StringVar()
+        zip_var = tk.BooleanVar(value=True)
+        
+        fields = [
+            ("Status:", ttk.Combobox(form, textvariable=status_var, values=['All', 'Active', 'Graduate', 'Inactive'],
+                                     state='readonly', width=22)),
+            ("Last School Year:", tk.Entry(form, textvariable=school_year_var, width=25)),
+            ("Series of Year:", tk.Entry(form, textvariable=series_year_var, width=25)),
+        ]
+        for row, (label, widget) in enumerate(fields):
+            tk.Label(form, text=label, font=('Arial', 11), bg=self.colors['background'],
+                     fg=self.colors['dark']).grid(row=row, column=0, sticky='w', pady=6)
+            widget.grid(row=row, column=1, sticky='w', pady=6, padx=(10, 0))
+        
+        tk.Label(
+            form,
+            text="Leave a field empty to include every value.",
+            font=('Arial', 9),
+            bg=self.colors['background'],
+            fg=self.colors['text']
+        ).grid(row=len(fields), column=0, columnspan=2, sticky='w', pady=(0, 10))
+        
+        tk.Checkbutton(
+            form,
+            text="Save as a single ZIP file",
+            variable=zip_var,
+            bg=self.colors['background'],
+            font=('Arial', 10)
+        ).grid(row=len(fields) + 1, column=0, columnspan=2, sticky='w')
+        
+        def start():
+            status = status_var.get()
+            filters = ("" if status == 'All' else status, school_year_var.get().strip(), series_year_var.get().strip())
             
-            # Status Distribution Table (changed from Category)
-            if status_stats:
-                status_title_style = ParagraphStyle(
-                    'StatusTitle',
-                    parent=styles['Heading3'],
-                    fontSize=14,
-                    textColor=colors.HexColor('#555555'),
-                    spaceAfter=10
-                )
-                
-                status_title = Paragraph("Distribution by Status:", status_title_style)  # Changed text
-                elements.append(status_title)
-                
-                status_data = [['Status', 'Number of Students', 'Percentage']]  # Changed column name
-                for status, count in status_stats:
-                    percentage = (count / total_students * 100) if total_students > 0 else 0
-                    status_data.append([status, str(count), f"{percentage:.1f}%"])
-                
-                status_table = Table(status_data, colWidths=[2*inch, 1.5*inch, 1.5*inch])
-                status_table.setStyle(TableStyle([
-                    ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#800000')),  # Maroon
-                    ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-                    ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-                    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                    ('FONTSIZE', (0, 0), (-1, 0), 12),
-                    ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-                    ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-                    ('GRID', (0, 0), (-1, -1), 1, colors.black),
-                    ('FONTSIZE', (0, 1), (-1, -1), 10),
-                ]))
-                
-                elements.append(status_table)
-                elements.append(Spacer(1, 30))
-            
-            # Monthly Statistics
-            if monthly_stats:
-                month_title_style = ParagraphStyle(
-                    'MonthTitle',
-                    parent=styles['Heading3'],
-                    fontSize=14,
-                    textColor=colors.HexColor('#555555'),
-                    spaceAfter=10
+            if zip_var.get():
+                output = filedialog.asksaveasfilename(
+                    defaultextension=".zip",
+                    filetypes=[("ZIP files", "*.zip")],
+                    initialfile=f"student_records_{datetime.now().strftime('%Y%m%d_%H%M%S')}.zip"
                 )
-                
-                month_title = Paragraph("Monthly Registration (Last 6 Months):", month_title_style)
-                elements.append(month_title)
-                
-                month_data = [['Month', 'New Registrations']]
-                for month, count in monthly_stats:
-                    month_data.append([month, str(count)])
-                
-                month_table = Table(month_data, colWidths=[2*inch, 2*inch])
-                month_table.setStyle(TableStyle([
-                    ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#C41E3A')),  # Crimson
-                    ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-                    ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-                    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                    ('FONTSIZE', (0, 0), (-1, 0), 12),
-                    ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-                    ('BACKGROUND', (0, 1), (-1, -1), colors.lavender),
-                    ('GRID', (0, 0), (-1, -1), 1, colors.black),
-                    ('FONTSIZE', (0, 1), (-1, -1), 10),
-                ]))
-                
-                elements.append(month_table)
-                elements.append(Spacer(1, 30))
+            else:
+                output = filedialog.askdirectory(title="Choose a folder for the PDFs")
+            if not output:
+                return
             
-            # Footer
-            footer_style = ParagraphStyle(
-                'Footer',
-                parent=styles['Normal'],
-                fontSize=9,
-                textColor=colors.HexColor('#999999'),
-                alignment=1
+            dialog.destroy()
+            self.run_in_background(self.query_batch_students, self.current_user, *filters,
+                                   on_done=lambda students: self.run_batch_export(students, output),
+                                   on_error=self.export_failed)
+        
+        export_btn = tk.Button(
+            dialog,
+            text="📤 Export",
+            command=start,
+            font=('Arial', 11, 'bold'),
+            bg=self.colors['primary'],
+            fg='white',
+            bd=0,
+            padx=20,
+            pady=10,
+            cursor='hand2'
+        )
+        export_btn.pack(pady=(20, 5))
+        
+        tk.Button(
+            dialog,
+            text="Close",
+            command=dialog.destroy,
+            font=('Arial', 10),
+            bg=self.colors['danger'],
+            fg='white',
+            bd=0,
+            padx=15,
+            pady=8,
+            cursor='hand2'
+        ).pack(pady=5)
+    
+    def query_batch_students(self, cursor, owner_id, status, last_school_year, series_year):
+        """Background job: full records matching the batch export filters"""
+        return self.worker_students(cursor).find_records(owner_id, status, last_school_year, series_year)
+    
+    def run_batch_export(self, students, output):
+        """Render the batch on a process pool while a cancellable progress dialog is shown"""
+        if not students:
+            messagebox.showwarning("No Data", "No student records match the selected filter")
+            return
+        
+        cancel_event = threading.Event()
+        dialog, bar, status_label = self.open_progress_dialog("🎓 Batch Export", "Starting workers...",
+                                                              on_cancel=cancel_event.set)
+        state = {'progress': (0, len(students)), 'done': False}
+        
+        def report(done, total):
+            state['progress'] = (done, total)
+        
+        def show_progress():
+            if state['done'] or not dialog.winfo_exists():
+                return
+            done, total = state['progress']
+            bar['value'] = done * 100 / total
+            status_label.config(text=f"{done:,} of {total:,} PDFs written")
+            dialog.after(100, show_progress)
+        
+        def batch_done(result):
+            state['done'] = True
+            dialog.destroy()
+            written, cancelled = result
+            if cancelled:
+                messagebox.showwarning("Export Cancelled", f"Export cancelled after {written:,} of {len(students):,} PDF(s).\nSaved to: {output}")
+            else:
+                messagebox.showinfo("Success", f"{written:,} student PDF(s) exported successfully!\nSaved to: {output}")
+        
+        def batch_failed(error):
+            state['done'] = True
+            dialog.destroy()
+            self.export_failed(error)
+        
+        show_progress()
+        self.run_in_thread(export_student_pdfs, students, output, None, report, cancel_event,
+                           on_done=batch_done, on_error=batch_failed)
+    
+    def export_statistics_to_pdf(self):
+        """Export system statistics to PDF"""
+        self.run_in_background(self.query_statistics, self.current_user,
+                               on_done=self.write_statistics_pdf, on_error=self.export_failed)
+    
+    def query_statistics(self, cursor, owner_id):
+        """Background job: status distribution and the last six months of registrations"""
+        students = self.worker_students(cursor)
+        return students.stats(owner_id), students.monthly_stats(owner_id, 6)
+    
+    def write_statistics_pdf(self, statistics):
+        """Write the statistics PDF report"""
+        try:
+            # Ask for save location
+            file_path = filedialog.asksaveasfilename(
+                defaultextension=".pdf",
+                filetypes=[("PDF files", "*.pdf"), ("All files", "*.*")],
+                initialfile=f"student_statistics_{datetime.now().strftime('%Y%m%d')}.pdf"
             )
             
-            footer = Paragraph(f"St. Peter's College - Student Records Management System", footer_style)
-            elements.append(footer)
+            if not file_path:
+                return
             
-            # Build PDF
-            doc.build(elements)
+            render_statistics_pdf(statistics, file_path)
             
             messagebox.showinfo("Success", f"Statistics exported successfully!\nSaved to: {file_path}")
             
@@ -1736,25 +3464,24 @@ class ModernLoginSystem:
         cred_id = item['values'][0]
         
         # Get student record details with attachments
-        self.cursor.execute('''
-            SELECT title, username, password, attachments, category, first_name, middle_name, last_name, created_at, updated_at 
-            FROM credentials 
-            WHERE id = ? AND owner_id = ?
-        ''', (cred_id, self.current_user))
-        
-        student = self.cursor.fetchone()
+        self.run_in_background(self.query_student_with_attachments, cred_id, self.current_user,
+                               on_done=self.write_student_images_pdf, on_error=self.export_failed)
+    
+    def query_student_with_attachments(self, cursor, cred_id, owner_id):
+        """Background job: one student record and its attachments"""
+        students = self.worker_students(cursor)
+        student = students.get_records(owner_id, [cred_id]).get(cred_id)
+        return student, students.attachments(cred_id) if student else []
+    
+    def write_student_images_pdf(self, result):
+        """Write the student record PDF with embedded images"""
+        student, attachments = result
         
         if not student:
             messagebox.showerror("Error", "Student record not found")
             return
         
-        title, id_number, first_name, attachments_json, status, fname, mname, lname, created_at, updated_at = student  # Changed variable name
-        
-        # Parse attachments
-        try:
-            attachments = json.loads(attachments_json) if attachments_json else []
-        except:
-            attachments = []
+        title, id_number, first_name, attachment_count, status, fname, mname, lname, created_at, updated_at = student[:10]  # Changed variable name
         
         if not attachments:
             messagebox.showwarning("No Images", "This student record has no attachments/images to export")
@@ -1771,6 +3498,12 @@ class ModernLoginSystem:
             if not file_path:
                 return
             
+            from reportlab.lib import colors
+            from reportlab.lib.pagesizes import A4
+            from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
+            from reportlab.lib.units import inch
+            from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Image as RLImage
+            
             # Create PDF document
             doc = SimpleDocTemplate(file_path, pagesize=A4)
             elements = []
@@ -1839,7 +3572,7 @@ class ModernLoginSystem:
             
             # Process and add images
             image_count = 0
-            for attachment_path in attachments:
+            for attachment_id, attachment_path, original_name in attachments:
                 if os.path.exists(attachment_path) and attachment_path.lower().endswith(('.png', '.jpg', '.jpeg', '.gif', '.bmp')):
                     try:
                         # Add image filename
@@ -1851,7 +3584,7 @@ class ModernLoginSystem:
                             spaceAfter=5
                         )
                         
-                        filename = os.path.basename(attachment_path)
+                        filename = original_name or os.path.basename(attachment_path)
                         filename_para = Paragraph(f"Image: {filename}", filename_style)
                         elements.append(filename_para)
                         
@@ -2250,38 +3983,28 @@ class ModernLoginSystem:
                     if lrn == "Enter LRN":
                         lrn = ""
                 
-                # Create title from name
-                title = f"{first_name} {last_name} ({id_number})"
-                
-                # Handle attachments - copy files to attachments directory
-                saved_attachments = []
-                if selected_files:
-                    # Create student-specific directory
-                    student_dir = os.path.join(self.attachments_dir, f"student_{id_number}")
-                    if not os.path.exists(student_dir):
-                        os.makedirs(student_dir)
+                # Handle attachments - files are stored in the background first and
+                # the record is only written once every copy has succeeded
+                def commit_record(saved_attachments):
+                    try:
+                        student = Student(id_number, first_name, last_name, status, middle_name, last_school_year,
+                                          contact_number, so_number, date_issued, series_year, lrn)
+                        try:
+                            with self.students.transaction():
+                                [cred_id] = self.students.upsert_many(self.current_user, [student])
+                                self.students.add_attachments(cred_id, saved_attachments)
+                        finally:
+                            # Removes the copied files again if the commit failed
+                            self.attachment_store.discard(self.cursor, [stored[0] for stored in saved_attachments])
+                        
+                        messagebox.showinfo("Success", f"Student record saved successfully!\nStatus: {status}\n{len(saved_attachments)} attachment(s) added.")
+                        dialog.destroy()
+                        self.refresh_credential_row(cred_id)  # Patch the new row into the list
                     
-                    for file_path in selected_files:
-                        if os.path.exists(file_path):
-                            # Generate unique filename
-                            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-                            filename = f"{timestamp}_{os.path.basename(file_path)}"
-                            dest_path = os.path.join(student_dir, filename)
-                            
-                            # Copy file to attachments directory
-                            shutil.copy2(file_path, dest_path)
-                            saved_attachments.append(dest_path)
-                
-                # Insert into database (using 'category' column for status)
-                self.cursor.execute('''
-                    INSERT INTO credentials (title, username, password, attachments, category, first_name, middle_name, last_name, owner_id, last_school_year, contact_number, so_number, date_issued, series_year, lrn)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)  -- ✅ ADDED LRN
-                ''', (title, id_number, first_name, json.dumps(saved_attachments), status, first_name, middle_name, last_name, self.current_user, last_school_year, contact_number, so_number, date_issued, series_year, lrn))  # ✅ ADDED LRN
-                self.conn.commit()
+                    except Exception as e:
+                        messagebox.showerror("Error", f"Failed to save student record: {str(e)}")
                 
-                messagebox.showinfo("Success", f"Student record saved successfully!\nStatus: {status}\n{len(saved_attachments)} attachment(s) added.")
-                dialog.destroy()
-                self.show_credentials()  # Refresh the student records list
+                self.ingest_attachments([path for path in selected_files if os.path.exists(path)], on_done=commit_record)
                 
             except Exception as e:
                 messagebox.showerror("Error", f"Failed to save student record: {str(e)}")
@@ -2342,24 +4065,19 @@ class ModernLoginSystem:
         cred_id = item['values'][0]
         
         # Get current student record details
-        self.cursor.execute('SELECT * FROM credentials WHERE id = ? AND owner_id = ?', 
-                          (cred_id, self.current_user))
-        cred = self.cursor.fetchone()
+        cred = self.students.get_records(self.current_user, [cred_id]).get(cred_id)
         
         if not cred:
             messagebox.showerror("Error", "Student record not found")
             return
         
         # Unpack the record (with LRN)
-        (cred_id_db, title, id_number, first_name, attachments_json, status, 
-         fname, mname, lname, owner_id, created_at, updated_at, last_school_year, 
+        (title, id_number, first_name, attachment_count, status, 
+         fname, mname, lname, created_at, updated_at, last_school_year, 
          contact_number, so_number, date_issued, series_year, lrn) = cred
+        cred_id_db = cred_id
         
-        # Parse attachments
-        try:
-            attachments = json.loads(attachments_json) if attachments_json else []
-        except:
-            attachments = []
+        attachments = self.students.attachments(cred_id_db)
         
         # Create edit dialog
         dialog = tk.Toplevel(self.root)
@@ -2582,10 +4300,10 @@ class ModernLoginSystem:
         
         # Load existing attachments
         selected_files = []  # Store file paths
-        for attachment in attachments:
+        for attachment_id, attachment, original_name in attachments:
             if os.path.exists(attachment):
                 selected_files.append(attachment)
-                attachments_listbox.insert(tk.END, os.path.basename(attachment))
+                attachments_listbox.insert(tk.END, original_name or os.path.basename(attachment))
         
         # Buttons for attachments
         attachments_buttons_frame = tk.Frame(attachments_frame, bg=self.colors['card_bg'])
@@ -2703,60 +4421,39 @@ class ModernLoginSystem:
                     if lrn == "Enter LRN":
                         lrn = ""
                 
-                # Create title from name
-                title = f"{first_name} {last_name} ({id_number})"
+                # Handle attachments - files already attached to this record are kept,
+                # new ones are stored in the background before anything is written
+                existing_files = {stored_path for _, stored_path, _ in attachments}
+                kept_files = [path for path in selected_files if path in existing_files and os.path.exists(path)]
+                added_files = [path for path in selected_files if path not in existing_files and os.path.exists(path)]
                 
-                # Handle attachments - copy new files to attachments directory
-                saved_attachments = []
-                student_dir = os.path.join(self.attachments_dir, f"student_{id_number}")
-                
-                # Clean up old attachments that are no longer selected
-                old_attachments = attachments
-                for old_attachment in old_attachments:
-                    if old_attachment not in selected_files and os.path.exists(old_attachment):
+                def commit_record(new_attachments):
+                    try:
+                        # Drop old attachments that are no longer selected (files removed after commit)
+                        removed = [(attachment_id, old_attachment) for attachment_id, old_attachment, original_name in attachments
+                                   if old_attachment not in selected_files]
+                        student = Student(id_number, first_name, last_name, status, middle_name, last_school_year,
+                                          contact_number, so_number, date_issued, series_year, lrn, id=cred_id_db)
                         try:
-                            os.remove(old_attachment)
-                        except:
-                            pass
-                
-                # Process selected files
-                for file_path in selected_files:
-                    if os.path.exists(file_path):
-                        # If file is already in the attachments directory, keep it
-                        if file_path.startswith(self.attachments_dir):
-                            saved_attachments.append(file_path)
-                        else:
-                            # Copy new file to attachments directory
-                            if not os.path.exists(student_dir):
-                                os.makedirs(student_dir)
-                            
-                            # Generate unique filename
-                            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-                            filename = f"{timestamp}_{os.path.basename(file_path)}"
-                            dest_path = os.path.join(student_dir, filename)
-                            
-                            # Copy file to attachments directory
-                            shutil.copy2(file_path, dest_path)
-                            saved_attachments.append(dest_path)
-                
-                # Update database (WITH LRN)
-                self.cursor.execute('''
-                    UPDATE credentials 
-                    SET title = ?, username = ?, password = ?, attachments = ?, 
-                        category = ?, first_name = ?, middle_name = ?, 
-                        last_name = ?, last_school_year = ?, contact_number = ?,
-                        so_number = ?, date_issued = ?, series_year = ?, lrn = ?,  -- ✅ ADDED LRN
-                        updated_at = CURRENT_TIMESTAMP
-                    WHERE id = ? AND owner_id = ?
-                ''', (title, id_number, first_name, json.dumps(saved_attachments), 
-                      status, first_name, middle_name, last_name,  # Changed variable
-                      last_school_year, contact_number, so_number, date_issued, series_year, lrn,  # ✅ ADDED LRN
-                      cred_id_db, self.current_user))
-                self.conn.commit()
+                            with self.students.transaction():
+                                self.students.delete_attachments([attachment_id for attachment_id, _ in removed])
+                                self.students.upsert_many(self.current_user, [student])
+                                self.students.add_attachments(cred_id_db, new_attachments)
+                        finally:
+                            # Removes the copied files again if the commit failed
+                            self.attachment_store.discard(self.cursor, [stored[0] for stored in new_attachments])
+                        
+                        self.students.purge_attachment_files([path for _, path in removed])
+                        
+                        saved_count = len(kept_files) + len(new_attachments)
+                        messagebox.showinfo("Success", f"Student record updated successfully!\nStatus: {status}\n{saved_count} attachment(s) saved.")
+                        dialog.destroy()
+                        self.refresh_credential_row(cred_id_db)  # Patch the edited row in place
+                    
+                    except Exception as e:
+                        messagebox.showerror("Error", f"Failed to update student record: {str(e)}")
                 
-                messagebox.showinfo("Success", f"Student record updated successfully!\nStatus: {status}\n{len(saved_attachments)} attachment(s) saved.")
-                dialog.destroy()
-                self.show_credentials()  # Refresh the student records list
+                self.ingest_attachments(added_files, on_done=commit_record)
                 
             except Exception as e:
                 messagebox.showerror("Error", f"Failed to update student record: {str(e)}")
@@ -2817,26 +4514,15 @@ class ModernLoginSystem:
         cred_id = item['values'][0]
         
         # Get student record details from database (WITH LRN)
-        self.cursor.execute('''
-            SELECT title, username, password, attachments, category, first_name, middle_name, last_name, created_at, updated_at, 
-                   last_school_year, contact_number, so_number, date_issued, series_year, lrn
-            FROM credentials 
-            WHERE id = ? AND owner_id = ?
-        ''', (cred_id, self.current_user))
-        
-        cred = self.cursor.fetchone()
+        cred = self.students.get_records(self.current_user, [cred_id]).get(cred_id)
         if not cred:
             messagebox.showerror("Error", "Student record not found")
             return
         
         # Unpack with LRN
-        title, id_number, first_name, attachments_json, status, fname, mname, lname, created_at, updated_at, last_school_year, contact_number, so_number, date_issued, series_year, lrn = cred
+        title, id_number, first_name, attachment_count, status, fname, mname, lname, created_at, updated_at, last_school_year, contact_number, so_number, date_issued, series_year, lrn = cred
         
-        # Parse attachments
-        try:
-            attachments = json.loads(attachments_json) if attachments_json else []
-        except:
-            attachments = []
+        attachments = self.students.attachments(cred_id)
         
         # Create view dialog
         dialog = tk.Toplevel(self.root)
@@ -2927,7 +4613,51 @@ class ModernLoginSystem:
             images_inner_frame = tk.Frame(images_canvas, bg=self.colors['card_bg'])
             
             canvas_window_id = images_canvas.create_window((0, 0), window=images_inner_frame, anchor="nw")
-            images_canvas.configure(xscrollcommand=images_scrollbar.set)
+            
+            # Thumbnails still waiting to be decoded: (label, path, frame)
+            pending_thumbnails = []
+            
+            def load_visible_thumbnails():
+                """Start decoding the placeholders that are scrolled into (or next to) view"""
+                if not pending_thumbnails or not images_canvas.winfo_exists():
+                    return
+                # One thumbnail of look-ahead on either side
+                left = images_canvas.canvasx(0) - 220
+                right = images_canvas.canvasx(images_canvas.winfo_width()) + 220
+                for entry in list(pending_thumbnails):
+                    label, path, frame = entry
+                    x = frame.winfo_x()
+                    if x + frame.winfo_width() >= left and x <= right:
+                        pending_thumbnails.remove(entry)
+                        thumbnail_jobs.append(self.run_in_pool(
+                            self.thumbnail_pool, self.thumbnail_cache.get, path,
+                            on_done=lambda img, label=label: show_thumbnail(label, img),
+                            on_error=lambda error, label=label: show_thumbnail(label, None)
+                        ))
+            
+            def show_thumbnail(label, img):
+                """Swap a placeholder for its decoded thumbnail (PhotoImage must be made on the Tk thread)"""
+                if not label.winfo_exists():
+                    return
+                if img is None:
+                    # If PIL fails, show file icon
+                    label.config(text="📄", font=('Arial', 48))
+                    return
+                from PIL import ImageTk
+                photo = ImageTk.PhotoImage(img)
+                label.config(image=photo, text="")
+                label.image = photo  # Keep a reference
+                image_widgets.append(photo)
+            
+            def on_images_scroll(first, last):
+                images_scrollbar.set(first, last)
+                load_visible_thumbnails()
+            
+            thumbnail_jobs = []
+            # Drop decodes that have not started if the dialog is closed early
+            dialog.bind('<Destroy>', lambda e: [job.cancel() for job in thumbnail_jobs] if e.widget is dialog else None, add='+')
+            
+            images_canvas.configure(xscrollcommand=on_images_scroll)
             
             # Function to configure canvas
             def configure_images_canvas(e):
@@ -2937,6 +4667,7 @@ class ModernLoginSystem:
                     canvas_width = attachments_frame.winfo_width()
                     if canvas_width > 1:
                         images_canvas.itemconfig(canvas_window_id, width=canvas_width-20)
+                    load_visible_thumbnails()
             
             images_inner_frame.bind("<Configure>", configure_images_canvas)
             
@@ -2944,7 +4675,7 @@ class ModernLoginSystem:
             image_widgets = []
             image_paths = []
             
-            for i, attachment_path in enumerate(attachments):
+            for i, (attachment_id, attachment_path, original_name) in enumerate(attachments):
                 if os.path.exists(attachment_path):
                     # Create frame for each image
                     img_frame = tk.Frame(images_inner_frame, bg=self.colors['card_bg'], relief='solid', bd=1)
@@ -2952,37 +4683,16 @@ class ModernLoginSystem:
                     
                     # Check if it's an image file
                     if attachment_path.lower().endswith(('.png', '.jpg', '.jpeg', '.gif', '.bmp')):
-                        try:
-                            # Open and resize the image
-                            img = Image.open(attachment_path)
-                            
-                            # Calculate new dimensions (max 200x200 while maintaining aspect ratio)
-                            max_size = (200, 200)
-                            img.thumbnail(max_size, Image.Resampling.LANCZOS)
-                            
-                            # Convert to PhotoImage
-                            photo = ImageTk.PhotoImage(img)
-                            
-                            # Display image in a label
-                            img_label = tk.Label(
-                                img_frame,
-                                image=photo,
-                                bg='white'
-                            )
-                            img_label.image = photo  # Keep a reference
-                            img_label.pack(pady=5)
-                            
-                            image_widgets.append(photo)
-                            
-                        except Exception as e:
-                            # If PIL fails, show file icon
-                            img_label = tk.Label(
-                                img_frame,
-                                text="📄",
-                                font=('Arial', 48),
-                                bg='white'
-                            )
-                            img_label.pack(pady=5)
+                        # Placeholder now; the 200x200 thumbnail is decoded in the
+                        # background once the frame is scrolled into view
+                        img_label = tk.Label(
+                            img_frame,
+                            text="🖼️",
+                            font=('Arial', 48),
+                            bg='white'
+                        )
+                        img_label.pack(pady=5)
+                        pending_thumbnails.append((img_label, attachment_path, img_frame))
                     else:
                         # For non-image files, show file icon
                         img_label = tk.Label(
@@ -2994,7 +4704,7 @@ class ModernLoginSystem:
                         img_label.pack(pady=5)
                     
                     # File name label
-                    filename = os.path.basename(attachment_path)
+                    filename = original_name or os.path.basename(attachment_path)
                     if len(filename) > 20:
                         filename = filename[:17] + "..."
                     
@@ -3028,7 +4738,7 @@ class ModernLoginSystem:
                     # File doesn't exist
                     tk.Label(
                         images_inner_frame,
-                        text=f"⚠️ File not found: {os.path.basename(attachment_path)}",
+                        text=f"⚠️ File not found: {original_name or os.path.basename(attachment_path)}",
                         font=('Arial', 9),
                         fg=self.colors['warning'],
                         bg=self.colors['card_bg']
@@ -3170,23 +4880,13 @@ class ModernLoginSystem:
         
         item = self.cred_tree.item(selection[0])
         cred_id = item['values'][0]
-        id_number = item['values'][1]
         
         # Get attachments from database
-        self.cursor.execute('SELECT attachments FROM credentials WHERE id = ? AND owner_id = ?', 
-                          (cred_id, self.current_user))
-        result = self.cursor.fetchone()
+        attachments = self.students.attachments(cred_id, self.current_user)
         
-        if result and result[0]:
-            try:
-                attachments = json.loads(result[0])
-                if attachments:
-                    # Open the first attachment
-                    self.open_file(attachments[0])
-                else:
-                    messagebox.showwarning("No Attachments", "This student record has no attachments")
-            except:
-                messagebox.showwarning("No Attachments", "This student record has no attachments")
+        if attachments:
+            # Open the first attachment
+            self.open_file(attachments[0][1])
         else:
             messagebox.showwarning("No Attachments", "This student record has no attachments")
     
@@ -3210,31 +4910,13 @@ class ModernLoginSystem:
         
         if messagebox.askyesno("Confirm Delete", f"Are you sure you want to delete '{first_name} {last_name}'?"):
             try:
-                # Get attachments before deleting
-                self.cursor.execute('SELECT attachments FROM credentials WHERE id = ? AND owner_id = ?', 
-                                  (cred_id, self.current_user))
-                result = self.cursor.fetchone()
-                
-                # Delete from database
-                self.cursor.execute('DELETE FROM credentials WHERE id = ? AND owner_id = ?', 
-                                  (cred_id, self.current_user))
-                self.conn.commit()
-                
-                # Optionally delete attachment files
-                if result and result[0]:
-                    try:
-                        attachments = json.loads(result[0])
-                        for attachment in attachments:
-                            if os.path.exists(attachment):
-                                try:
-                                    os.remove(attachment)
-                                except:
-                                    pass
-                    except:
-                        pass
+                # Attachment rows go with the record via trigger; their files once it is committed
+                with self.students.transaction():
+                    freed_files = self.students.delete_many(self.current_user, [cred_id])
+                self.students.purge_attachment_files(freed_files)
                 
                 messagebox.showinfo("Success", "Student record deleted successfully!")
-                self.show_credentials()  # Refresh the list
+                self.refresh_credential_row(cred_id)  # Drop the row from the list
             except Exception as e:
                 messagebox.showerror("Error", f"Failed to delete student record: {str(e)}")
     
@@ -3242,6 +4924,106 @@ class ModernLoginSystem:
         """Export student records to file"""
         self.export_options()
     
+    def open_progress_dialog(self, title, message, on_cancel=None):
+        """Small modal window with a progress bar (and optional Cancel button) for long background jobs"""
+        dialog = tk.Toplevel(self.root)
+        dialog.title(title)
+        dialog.geometry("420x210" if on_cancel else "420x160")
+        dialog.configure(bg=self.colors['background'])
+        dialog.transient(self.root)
+        dialog.grab_set()
+        dialog.resizable(False, False)
+        # Closing mid-job would hide the only progress report
+        dialog.protocol("WM_DELETE_WINDOW", lambda: None)
+        
+        tk.Label(
+            dialog,
+            text=title,
+            font=('Arial', 14, 'bold'),
+            fg=self.colors['primary'],
+            bg=self.colors['background']
+        ).pack(pady=(20, 10))
+        
+        bar = ttk.Progressbar(dialog, orient='horizontal', length=360, mode='determinate', maximum=100)
+        bar.pack(pady=5)
+        
+        status_label = tk.Label(
+            dialog,
+            text=message,
+            font=('Arial', 10),
+            fg=self.colors['text'],
+            bg=self.colors['background']
+        )
+        status_label.pack(pady=5)
+        
+        if on_cancel:
+            def cancel():
+                cancel_btn.config(state='disabled', text="Cancelling...")
+                on_cancel()
+            
+            cancel_btn = tk.Button(
+                dialog,
+                text="Cancel",
+                command=cancel,
+                font=('Arial', 10),
+                bg=self.colors['danger'],
+                fg='white',
+                bd=0,
+                padx=15,
+                pady=6,
+                cursor='hand2'
+            )
+            cancel_btn.pack(pady=10)
+        return dialog, bar, status_label
+    
+    def import_students_csv(self):
+        """Bulk import student records from a registrar CSV export"""
+        csv_path = filedialog.askopenfilename(
+            title="Import Students from CSV",
+            filetypes=[("CSV files", "*.csv"), ("All files", "*.*")]
+        )
+        if not csv_path:
+            return
+        
+        reject_path = os.path.splitext(csv_path)[0] + "_rejected.csv"
+        dialog, bar, status_label = self.open_progress_dialog("📥 Importing Students", "Reading CSV...")
+        # Written by the worker thread, read by the Tk thread
+        state = {'progress': (0, 0, 0.0), 'done': False}
+        
+        def show_progress():
+            if state['done'] or not dialog.winfo_exists():
+                return
+            imported, rejected, fraction = state['progress']
+            bar['value'] = fraction * 100
+            status_label.config(text=f"{imported:,} imported, {rejected:,} rejected")
+            dialog.after(100, show_progress)
+        
+        def import_done(result):
+            state['done'] = True
+            dialog.destroy()
+            imported, rejected = result
+            message = f"{imported:,} student record(s) imported."
+            if rejected:
+                message += f"\n{rejected:,} row(s) rejected - see:\n{reject_path}"
+            messagebox.showinfo("Import Complete", message)
+            if getattr(self, 'cred_tree', None) and self.cred_tree.winfo_exists():
+                self.filter_credentials()
+        
+        def import_failed(error):
+            state['done'] = True
+            dialog.destroy()
+            messagebox.showerror("Import Error", f"Failed to import CSV: {str(error)}\n\nBatches already committed were kept.")
+        
+        show_progress()
+        self.run_in_background(self.import_csv_job, csv_path, reject_path, self.current_user, state,
+                               on_done=import_done, on_error=import_failed)
+    
+    def import_csv_job(self, cursor, csv_path, reject_path, owner_id, state):
+        """Background job: run the CSV import on the worker connection"""
+        def report(imported, rejected, fraction):
+            state['progress'] = (imported, rejected, fraction)
+        return import_students_from_csv(cursor.connection, csv_path, owner_id, reject_path, progress=report)
+    
     # ==========================================================
     # SETTINGS PAGE (Functional Buttons)
     # ==========================================================
@@ -3294,9 +5076,10 @@ class ModernLoginSystem:
 
         # ================= FUNCTIONAL BUTTONS =================
         create_settings_button("User Management", "👥", self.show_user_management)
-        create_settings_button("Database Backup", "🗄️", self.backup_database)
+        create_settings_button("Database Backup", "🗄️", self.show_backup_options)
         create_settings_button("Theme Settings", "🎨", self.show_theme_settings)
         create_settings_button("Change Password", "🔐", self.change_password)
+        create_settings_button("Query Diagnostics", "📊", self.show_query_diagnostics)
         create_settings_button("Back to Dashboard", "⬅", self.show_main_dashboard)
 
     # ==========================================================
@@ -3371,13 +5154,224 @@ class ModernLoginSystem:
             if not save_path:
                 return  # Cancelled
 
-            shutil.copy(db_file, save_path)
+            # Online backup on its own thread and connection; the app keeps working meanwhile
+            dialog, bar, status_label = self.open_progress_dialog("🗄️ Backing Up Database", "Copying pages...")
+            state = {'progress': (0, 0), 'done': False}
+
+            def report(done, total):
+                state['progress'] = (done, total)
+
+            def show_progress():
+                if state['done'] or not dialog.winfo_exists():
+                    return
+                done, total = state['progress']
+                if total:
+                    bar['value'] = done * 100 / total
+                    status_label.config(text=f"{done:,} of {total:,} pages copied")
+                dialog.after(100, show_progress)
+
+            def backup_done(pages):
+                state['done'] = True
+                dialog.destroy()
+                messagebox.showinfo("Backup Success", f"Database backup saved ✅\n{pages:,} pages, integrity check passed\n\n{save_path}")
+
+            def backup_failed(error):
+                state['done'] = True
+                dialog.destroy()
+                messagebox.showerror("Backup Error", f"Failed to backup database:\n\n{error}")
 
-            messagebox.showinfo("Backup Success", f"Database backup saved ✅\n\n{save_path}")
+            show_progress()
+            self.run_in_thread(backup_database_online, db_file, save_path, BACKUP_PAGES_PER_STEP, report,
+                               on_done=backup_done, on_error=backup_failed)
 
         except Exception as e:
             messagebox.showerror("Backup Error", f"Failed to backup database:\n\n{e}")
 
+    def show_backup_options(self):
+        """Choose between a full copy, an incremental backup and a restore"""
+        dialog = tk.Toplevel(self.root)
+        dialog.title("Database Backup")
+        dialog.geometry("420x330")
+        dialog.configure(bg=self.colors['background'])
+        dialog.transient(self.root)
+        dialog.grab_set()
+        dialog.resizable(False, False)
+        
+        tk.Label(
+            dialog,
+            text="🗄️ Database Backup",
+            font=('Arial', 20, 'bold'),
+            fg=self.colors['primary'],
+            bg=self.colors['background']
+        ).pack(pady=(30, 20))
+        
+        options = [
+            ("💾 Full Copy (.db)", self.backup_database),
+            ("🔁 Incremental Backup", self.incremental_backup_database),
+            ("♻️ Restore from Backup", self.restore_database_backup)
+        ]
+        
+        for btn_text, command in options:
+            btn = tk.Button(
+                dialog,
+                text=btn_text,
+                command=lambda cmd=command: self.execute_export(cmd, dialog),
+                font=('Arial', 11),
+                bg=self.colors['primary'],
+                fg='white',
+                bd=0,
+                padx=20,
+                pady=10,
+                cursor='hand2',
+                width=30
+            )
+            btn.pack(pady=5)
+            btn.bind('<Enter>', lambda e, b=btn: b.config(bg=self.colors['secondary']))
+            btn.bind('<Leave>', lambda e, b=btn: b.config(bg=self.colors['primary']))
+        
+        tk.Button(
+            dialog,
+            text="Close",
+            command=dialog.destroy,
+            font=('Arial', 10),
+            bg=self.colors['danger'],
+            fg='white',
+            bd=0,
+            padx=15,
+            pady=8,
+            cursor='hand2'
+        ).pack(pady=20)
+    
+    def run_backup_job(self, title, func, *args, on_done):
+        """Run func(*args, progress) on its own thread behind a progress dialog"""
+        dialog, bar, status_label = self.open_progress_dialog(title, "Starting...")
+        state = {'progress': ("", 0, 0), 'done': False}
+        
+        def report(stage, done, total):
+            state['progress'] = (stage, done, total)
+        
+        def show_progress():
+            if state['done'] or not dialog.winfo_exists():
+                return
+            stage, done, total = state['progress']
+            if total:
+                bar['value'] = done * 100 / total
+                status_label.config(text=f"{stage}: {done:,} of {total:,}")
+            dialog.after(100, show_progress)
+        
+        def job_done(result):
+            state['done'] = True
+            dialog.destroy()
+            on_done(result)
+        
+        def job_failed(error):
+            state['done'] = True
+            dialog.destroy()
+            messagebox.showerror("Backup Error", f"{title} failed:\n\n{error}")
+        
+        show_progress()
+        self.run_in_thread(func, *args, report, on_done=job_done, on_error=job_failed)
+    
+    def incremental_backup_database(self):
+        """Add a compressed full or delta backup to a backup folder"""
+        backup_dir = filedialog.askdirectory(title="Select Backup Folder")
+        if not backup_dir:
+            return
+        
+        def backup_done(entry):
+            size = sum(os.path.getsize(os.path.join(backup_dir, name))
+                       for name in (entry['data_file'], entry['attachments_file']) if name)
+            messagebox.showinfo(
+                "Backup Success",
+                f"{entry['kind'].title()} backup #{entry['id']} saved ✅\n"
+                f"{entry['pages_written']:,} of {entry['page_count']:,} pages stored, "
+                f"{len(entry['attachments'])} new attachment(s)\n"
+                f"{size / 1024:,.1f} KB on disk\n\n{backup_dir}"
+            )
+        
+        self.run_backup_job("🔁 Incremental Backup", incremental_backup, "modern_users.db", backup_dir,
+                            BACKUP_FULL_EVERY, BACKUP_KEEP_CHAINS, on_done=backup_done)
+    
+    def restore_database_backup(self):
+        """Pick a backup from a chain and rebuild it as a new database file"""
+        backup_dir = filedialog.askdirectory(title="Select Backup Folder")
+        if not backup_dir:
+            return
+        try:
+            entries = load_backup_manifest(backup_dir)['backups']
+        except (OSError, ValueError) as e:
+            messagebox.showerror("Restore Error", f"Cannot read backup manifest:\n\n{e}")
+            return
+        if not entries:
+            messagebox.showwarning("No Backups", "No backups found in this folder")
+            return
+        
+        dialog = tk.Toplevel(self.root)
+        dialog.title("Restore from Backup")
+        dialog.geometry("460x380")
+        dialog.configure(bg=self.colors['background'])
+        dialog.transient(self.root)
+        dialog.grab_set()
+        
+        tk.Label(
+            dialog,
+            text="♻️ Select a Backup",
+            font=('Arial', 16, 'bold'),
+            fg=self.colors['primary'],
+            bg=self.colors['background']
+        ).pack(pady=(20, 10))
+        
+        listbox = tk.Listbox(dialog, font=('Arial', 10), height=10, width=50)
+        listbox.pack(padx=20, pady=5, fill='both', expand=True)
+        for entry in reversed(entries):
+            listbox.insert('end', f"#{entry['id']}  {entry['created_at']}  ({entry['kind']})")
+        listbox.selection_set(0)
+        
+        def restore():
+            selection = listbox.curselection()
+            if not selection:
+                return
+            entry = entries[len(entries) - 1 - selection[0]]
+            dest_path = filedialog.asksaveasfilename(
+                title="Save Restored Database",
+                defaultextension=".db",
+                filetypes=[("Database File", "*.db"), ("All Files", "*.*")],
+                initialfile=f"restored_{entry['id']:05d}.db"
+            )
+            if not dest_path:
+                return
+            dialog.destroy()
+            
+            # Never extract over the folder the database was saved in: that is usually the
+            # app folder, whose student_attachments tree belongs to the live database
+            has_attachments = any(backup['attachments_file'] for backup in entries
+                                  if backup['base'] == entry['base'] and backup['id'] <= entry['id'])
+            attachments_root = os.path.splitext(dest_path)[0] + "_attachments" if has_attachments else None
+            
+            def restore_done(entry):
+                message = f"Backup #{entry['id']} restored ✅\nChecksum verified\n\n{dest_path}"
+                if attachments_root:
+                    # Attachment paths are relative to the folder the app runs from
+                    message += (f"\n\nAttachments were extracted to:\n{attachments_root}\n\n"
+                                f"Move the database into that folder before opening it.")
+                messagebox.showinfo("Restore Success", message)
+            
+            self.run_backup_job("♻️ Restoring Backup", restore_backup, backup_dir, dest_path, entry['id'],
+                                attachments_root, on_done=restore_done)
+        
+        tk.Button(
+            dialog,
+            text="Restore",
+            command=restore,
+            font=('Arial', 11, 'bold'),
+            bg=self.colors['primary'],
+            fg='white',
+            bd=0,
+            padx=20,
+            pady=8,
+            cursor='hand2'
+        ).pack(pady=15)
+
     # ==========================================================
     # 3) THEME SETTINGS BUTTON FUNCTION (WORKING)
     # ==========================================================
@@ -3503,6 +5497,122 @@ class ModernLoginSystem:
             pady=8,
             cursor="hand2"
         ).pack(pady=(0, 15))
+
+    # ==========================================================
+    # 4) QUERY DIAGNOSTICS BUTTON FUNCTION
+    # ==========================================================
+    def show_query_diagnostics(self):
+        """Per-statement latency, rows and recent slow queries on the app's connections"""
+        # Clear main content (except navbar)
+        for widget in self.main_content.winfo_children():
+            if widget != self.navbar:
+                widget.destroy()
+        
+        page = tk.Frame(self.main_content, bg=self.colors['light'])
+        page.pack(fill=tk.BOTH, expand=True, padx=30, pady=(20, 30))
+        
+        tk.Label(
+            page,
+            text="📊 Query Diagnostics",
+            font=("Arial", 24, "bold"),
+            bg=self.colors['light'],
+            fg=self.colors['dark']
+        ).pack(pady=(10, 5))
+        
+        summary_label = tk.Label(page, text="", font=("Arial", 10), bg=self.colors['light'], fg="gray",
+                                 justify=tk.LEFT, wraplength=1000)
+        summary_label.pack(pady=(0, 10))
+        
+        # Threshold, reset and back
+        controls = tk.Frame(page, bg=self.colors['light'])
+        controls.pack(fill=tk.X, pady=(0, 10))
+        
+        tk.Label(controls, text="Slow query threshold (ms):", font=("Arial", 10, "bold"),
+                 bg=self.colors['light'], fg=self.colors['dark']).pack(side=tk.LEFT)
+        threshold_var = tk.StringVar(value=f"{self.query_stats.slow_ms:g}")
+        
+        def apply_threshold(event=None):
+            try:
+                self.query_stats.slow_ms = max(1.0, float(threshold_var.get()))
+            except ValueError:
+                pass
+            threshold_var.set(f"{self.query_stats.slow_ms:g}")
+        
+        threshold_box = tk.Spinbox(controls, from_=1, to=60000, increment=50, width=8,
+                                   textvariable=threshold_var, command=apply_threshold)
+        threshold_box.pack(side=tk.LEFT, padx=(5, 20))
+        threshold_box.bind("<Return>", apply_threshold)
+        threshold_box.bind("<FocusOut>", apply_threshold)
+        
+        for text, command, color in (("⬅ Back to Settings", self.show_settings, self.colors['primary']),
+                                     ("Reset", lambda: (self.query_stats.reset(), refresh(reschedule=False)), "#6c757d")):
+            tk.Button(controls, text=text, command=command, font=("Arial", 10, "bold"), bg=color, fg="white",
+                      bd=0, padx=15, pady=6, cursor="hand2").pack(side=tk.RIGHT, padx=(10, 0))
+        
+        # Statements, slowest total first
+        tree_frame = tk.Frame(page, bg=self.colors['light'])
+        tree_frame.pack(fill=tk.BOTH, expand=True)
+        columns = ('Statement', 'Calls', 'Total ms', 'Avg ms', 'p50 ms', 'p95 ms', 'Max ms', 'Rows')
+        tree = ttk.Treeview(tree_frame, columns=columns, show='headings', selectmode='browse', height=12)
+        for column in columns:
+            tree.heading(column, text=column, anchor='w')
+            tree.column(column, width=80, stretch=False, anchor='e')
+        tree.column('Statement', width=560, stretch=True, anchor='w')
+        tree_scrollbar = ttk.Scrollbar(tree_frame, orient='vertical', command=tree.yview)
+        tree.configure(yscrollcommand=tree_scrollbar.set)
+        tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        tree_scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        
+        tk.Label(page, text=f"Recent slow queries (all of them are in {self.SLOW_QUERY_LOG}); "
+                            "p50/p95 are histogram bucket bounds",
+                 font=("Arial", 10, "bold"), bg=self.colors['light'], fg=self.colors['dark']).pack(anchor='w', pady=(10, 5))
+        slow_text = tk.Text(page, height=10, font=("Courier", 9), wrap=tk.WORD, bg='white', relief='solid', bd=1)
+        slow_text.pack(fill=tk.X)
+        shown = {'slow_total': None}
+        
+        def refresh(reschedule=True):
+            """Redraw from the live counters every two seconds while the page is open"""
+            if not tree.winfo_exists():
+                return
+            statements = self.query_stats.snapshot()
+            tree.delete(*tree.get_children())
+            for s in statements:
+                tree.insert('', tk.END, values=(
+                    s['sql'][:300], f"{s['calls']:,}", f"{s['total_ms']:,.1f}", f"{s['avg_ms']:.2f}",
+                    f"{s['p50_ms']:g}", f"{s['p95_ms']:g}", f"{s['max_ms']:.1f}", f"{s['rows']:,}"
+                ))
+            
+            stats = self.query_stats
+            with stats.lock:
+                executed = sorted(stats.executed.items(), key=lambda item: item[1], reverse=True)
+                slow = list(stats.slow)
+                slow_total = stats.slow_total
+            calls = sum(s['calls'] for s in statements)
+            total_ms = sum(s['total_ms'] for s in statements)
+            since = datetime.fromtimestamp(stats.started).strftime('%Y-%m-%d %H:%M:%S')
+            summary_label.config(text=(
+                f"{calls:,} statements timed ({len(statements):,} distinct), {total_ms / 1000:,.2f}s in total "
+                f"since {since}; {slow_total:,} slower than {stats.slow_ms:g} ms\n"
+                f"Run by SQLite (including executemany rows, triggers and transactions): "
+                + (", ".join(f"{kind} {count:,}" for kind, count in executed) or "nothing yet")
+            ))
+            
+            if slow_total != shown['slow_total']:
+                shown['slow_total'] = slow_total
+                slow_text.config(state=tk.NORMAL)
+                slow_text.delete('1.0', tk.END)
+                for entry in reversed(slow):
+                    slow_text.insert(tk.END, f"{entry['timestamp']}  {entry['elapsed_ms']:.1f} ms  "
+                                             f"{max(entry['rows'], 0):,} rows\n{entry['sql']}\n")
+                    slow_text.insert(tk.END, "".join(f"    {line}\n" for line in entry['plan'].splitlines()) + "\n")
+                if not slow:
+                    slow_text.insert(tk.END, "No slow queries yet.")
+                slow_text.config(state=tk.DISABLED)
+            
+            if reschedule:
+                page.after(2000, refresh)
+        
+        refresh()
     
     def show_help(self):
         """Show help screen"""
@@ -3734,6 +5844,8 @@ class ModernLoginSystem:
             self.current_role = None
             self.create_login_screen()
 
-# Run the application
+# Run the application (or a command-line job)
 if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        sys.exit(run_cli(sys.argv[1:]))
     app = ModernLoginSystem()
\ No newline at end of file